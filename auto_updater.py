@@ -34,9 +34,9 @@ except Exception as e:
     GUI_AVAILABLE = False
     print(f"GUI环境不可用: {e}，将使用命令行模式")
 
-# 尝试导入requests，如果失败则使用虚拟环境
+# 尝试导入httpx，如果失败则使用虚拟环境
 try:
-    import requests
+    import httpx
 except ImportError:
     # 激活虚拟环境并重新运行脚本
     venv_python = "/home/orangepi/test1/bin/python"
@@ -47,7 +47,7 @@ except ImportError:
         os.execve(venv_python, [venv_python] + sys.argv, env)
     else:
         print("错误：虚拟环境不存在，请先安装依赖")
-        print("运行：source /home/orangepi/test1/bin/activate && pip install requests")
+        print("运行：source /home/orangepi/test1/bin/activate && pip install httpx")
         sys.exit(1)
 
 # 服务器基础地址 - 需要根据您的实际服务器地址修改
@@ -371,7 +371,7 @@ def get_remote_version():
     """从服务器获取最新版本"""
     try:
         log(f"检查更新：{VERSION_INFO_URL}")
-        response = requests.get(VERSION_INFO_URL, timeout=15)
+        response = httpx.get(VERSION_INFO_URL, timeout=15, follow_redirects=True)
         response.raise_for_status()
         return json.loads(response.text)
     except Exception as e:
@@ -399,30 +399,30 @@ def download_update(download_url, save_path):
     try:
         log(f"开始下载：{download_url}")
         save_path.parent.mkdir(parents=True, exist_ok=True)
-        response = requests.get(download_url, stream=True, timeout=60)
-        response.raise_for_status()
-        
-        # 获取文件大小
-        total_size = int(response.headers.get('content-length', 0))
-        downloaded = 0
-        
-        with open(save_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    
-                    # 更新下载进度
-                    if status_window and total_size > 0:
-                        progress = int((downloaded / total_size) * 30) + 20  # 20-50%
-                        status_window.set_progress(progress)
-                        size_mb = downloaded / 1024 / 1024
-                        total_mb = total_size / 1024 / 1024
-                        status_window.update_status(
-                            f"正在下载更新包 ({size_mb:.1f}MB/{total_mb:.1f}MB)",
-                            f"下载进度: {downloaded/total_size*100:.1f}%"
-                        )
-                        status_window.process_events()
+        with httpx.stream("GET", download_url, timeout=60, follow_redirects=True) as response:
+            response.raise_for_status()
+
+            # 获取文件大小
+            total_size = int(response.headers.get('content-length', 0))
+            downloaded = 0
+
+            with open(save_path, "wb") as f:
+                for chunk in response.iter_bytes(chunk_size=8192):
+                    if chunk:
+                        f.write(chunk)
+                        downloaded += len(chunk)
+
+                        # 更新下载进度
+                        if status_window and total_size > 0:
+                            progress = int((downloaded / total_size) * 30) + 20  # 20-50%
+                            status_window.set_progress(progress)
+                            size_mb = downloaded / 1024 / 1024
+                            total_mb = total_size / 1024 / 1024
+                            status_window.update_status(
+                                f"正在下载更新包 ({size_mb:.1f}MB/{total_mb:.1f}MB)",
+                                f"下载进度: {downloaded/total_size*100:.1f}%"
+                            )
+                            status_window.process_events()
 
         log(f"下载完成：{save_path}")
         return True
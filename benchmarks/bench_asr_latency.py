@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""ASR 端到端时延基准：ASRThread 对接本地模拟服务，按网络场景统计各阶段耗时
+
+对每个场景启动一个 MockASRServer，按实时速度向 AudioBuffer 写入音频（模拟边录边传），
+记录 ASRThread.timings 中的建连、首个响应、首个结果耗时，以及录音结束到最终结果的尾延迟。
+
+用法：
+    python -m benchmarks.bench_asr_latency [--profiles lan,wifi,4g,poor] [--runs 5]
+                                           [--seconds 3] [--mode stream|buffer] [--cold]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from benchmarks.bench_asr_protocol import make_speech_like_pcm  # noqa: E402
+from benchmarks.mock_asr_server import MockASRServer  # noqa: E402
+from threads.asr_thread import ASRThread  # noqa: E402
+from utils.audio_buffer import AudioBuffer  # noqa: E402
+from utils.config import Config  # noqa: E402
+
+# 场景：(RTT ms, 抖动 ms, 丢包率, 服务端处理 ms)
+PROFILES = {
+    "lan": (5, 1, 0.0, 10),
+    "wifi": (30, 10, 0.005, 20),
+    "4g": (80, 30, 0.01, 20),
+    "poor": (250, 100, 0.03, 30),
+}
+
+STAGES = ("connect", "first_response", "first_result", "final", "tail")
+
+
+def feed_realtime(buffer, pcm, chunk_ms=100):
+    """按实时速度写入 PCM，返回录音结束时刻"""
+    step = buffer.bytes_per_second * chunk_ms // 1000
+    start = time.monotonic()
+    for i, offset in enumerate(range(0, len(pcm), step)):
+        delay = start + i * chunk_ms / 1000 - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        buffer.write(pcm[offset: offset + step])
+    buffer.close()
+    return time.monotonic()
+
+
+def run_once(thread, pcm, mode):
+    buffer = AudioBuffer(max_seconds=len(pcm) / 32000 + 1)
+    if mode == "stream":
+        end = {}
+        feeder = threading.Thread(target=lambda: end.setdefault("t", feed_realtime(buffer, pcm)))
+        feeder.start()
+        text = thread.connections.run(thread.recognize_stream(buffer))
+        done = time.monotonic()
+        feeder.join()
+        audio_end = end["t"]
+    else:
+        buffer.write(pcm)
+        buffer.close()
+        audio_end = time.monotonic()
+        text = thread.connections.run(thread.recognize_buffer(buffer))
+        done = time.monotonic()
+
+    timings = dict(thread.timings)
+    timings["tail"] = done - audio_end
+    return text, timings
+
+
+def summarize(samples):
+    cells = []
+    for stage in STAGES:
+        values = [s[stage] * 1000 for s in samples if stage in s]
+        if not values:
+            cells.append(f"{'-':>16}")
+            continue
+        p95 = sorted(values)[min(len(values) - 1, int(len(values) * 0.95))]
+        cells.append(f"{statistics.median(values):.0f}/{p95:.0f}".rjust(16))
+    return "".join(cells)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", default=",".join(PROFILES))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--mode", choices=("stream", "buffer"), default="stream")
+    parser.add_argument("--cold", action="store_true", help="关闭连接预热，每次新建连接")
+    args = parser.parse_args()
+
+    config = Config.get_instance()
+    config.ASR_LOCAL_MODE = "off"   # 只测云端链路
+    config.ASR_PREWARM = not args.cold
+    pcm = make_speech_like_pcm(args.seconds)
+
+    print(f"{args.mode} 模式，音频 {args.seconds:.1f}s，每场景 {args.runs} 次，"
+          f"{'冷启动' if args.cold else '预热连接'}（单位 ms，中位数/p95）")
+    print(f"{'场景':<6}" + "".join(f"{s:>16}" for s in STAGES))
+
+    for name in args.profiles.split(","):
+        rtt, jitter, loss, proc = PROFILES[name]
+        server = MockASRServer(port=0, rtt_ms=rtt, jitter_ms=jitter, loss=loss,
+                               proc_ms=proc, seed=0).start()
+        config.ASR_WS_URL = server.url
+        thread = ASRThread(streaming=args.mode == "stream")
+        samples = []
+        try:
+            for _ in range(args.runs):
+                if not args.cold:
+                    thread.connections.prewarm()
+                    time.sleep(rtt * 3 / 1000 + 0.05)  # 等预热连接建立（模拟用户开口前的间隔）
+                text, timings = run_once(thread, pcm, args.mode)
+                if not text:
+                    print(f"  {name}: 识别失败")
+                samples.append(timings)
+        finally:
+            thread.connections.reset()
+            server.stop()
+        print(f"{name:<8}" + summarize(samples))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""ASR 帧协议编解码微基准：旧实现（逐包 bytearray + gzip.compress）对比 utils.asr_protocol
+
+打包对比在同一 gzip 级别下进行，只衡量编解码改动；默认 9 级一行单独列出，衡量降级别的收益。
+
+用法（在板子上运行以得到 A53 上的真实数据）：
+    python -m benchmarks.bench_asr_protocol [--segment-ms 200] [--level 1] [--number 2000]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import asr_protocol  # noqa: E402
+
+
+# ---------- 旧实现（照搬重构前的 ASRThread） ----------
+
+def legacy_header(message_type=0b0001, flags=0b0000):
+    header = bytearray()
+    header.append((0b0001 << 4) | 1)
+    header.append((message_type << 4) | flags)
+    header.append((0b0001 << 4) | 0b0001)
+    header.append(0x00)
+    return header
+
+
+def legacy_pack_audio(chunk, is_last, level=9):
+    chunk_bytes = gzip.compress(chunk, compresslevel=level)
+    header = legacy_header(0b0010, 0b0010 if is_last else 0b0000)
+    audio_request = bytearray(header)
+    audio_request.extend(len(chunk_bytes).to_bytes(4, 'big'))
+    audio_request.extend(chunk_bytes)
+    return audio_request
+
+
+def legacy_slice(data, chunk_size):
+    offset = 0
+    while offset + chunk_size < len(data):
+        yield data[offset: offset + chunk_size], False
+        offset += chunk_size
+    yield data[offset:], True
+
+
+def legacy_parse(res):
+    header_size = res[0] & 0x0f
+    message_type = res[1] >> 4
+    payload = res[header_size * 4:]
+    payload_msg = None
+    if message_type == 0b1001:
+        payload_msg = payload[4:]
+    payload_msg = gzip.decompress(payload_msg)
+    return {'payload_msg': json.loads(payload_msg.decode("utf-8"))}
+
+
+# ---------- 测试数据 ----------
+
+def make_speech_like_pcm(seconds, rate=16000):
+    """生成带噪声的类语音 PCM（纯零数据会让 gzip 结果失真）"""
+    import math
+    import random
+    rnd = random.Random(0)
+    samples = bytearray()
+    for i in range(int(seconds * rate)):
+        v = 6000 * math.sin(2 * math.pi * 180 * i / rate) * (0.5 + 0.5 * math.sin(i / 900))
+        v += rnd.gauss(0, 400)
+        samples += int(max(-32768, min(32767, v))).to_bytes(2, 'little', signed=True)
+    return bytes(samples)
+
+
+def make_response():
+    msg = {'code': 1000, 'sequence': 3, 'result': [{'text': '一只在月球上弹吉他的橘猫，赛博朋克风格'}]}
+    payload = gzip.compress(json.dumps(msg, ensure_ascii=False).encode())
+    return bytes([0x11, 0x91, 0x11, 0x00]) + len(payload).to_bytes(4, 'big') + payload
+
+
+def report(name, seconds, number, nbytes=None):
+    per = seconds / number * 1e6
+    extra = f"  {nbytes / 1024:.1f} KiB/包" if nbytes else ""
+    print(f"  {name:<28}{per:10.1f} µs/次{extra}")
+    return per
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--segment-ms", type=int, default=200)
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    segment = 16000 * 2 * args.segment_ms // 1000
+    pcm = make_speech_like_pcm(15)
+    chunk = pcm[:segment]
+    packer = asr_protocol.ASRPacker(args.level)
+    response = make_response()
+    n = args.number
+
+    print(f"分包 {args.segment_ms}ms（{segment} 字节），gzip 级别 {args.level}，每项 {n} 次")
+
+    print("打包音频帧：")
+    default = report("旧: gzip.compress 9 级(默认)",
+                     timeit.timeit(lambda: legacy_pack_audio(chunk, False), number=n), n,
+                     len(legacy_pack_audio(chunk, False)))
+    old = report(f"旧: gzip.compress {args.level} 级",
+                 timeit.timeit(lambda: legacy_pack_audio(chunk, False, args.level), number=n), n,
+                 len(legacy_pack_audio(chunk, False, args.level)))
+    new = report(f"新: ASRPacker.pack_audio {args.level} 级",
+                 timeit.timeit(lambda: packer.pack_audio(chunk, False), number=n), n,
+                 len(packer.pack_audio(chunk, False)))
+    print(f"  同级别加速 {old / new:.2f}x，相对默认 9 级 {default / new:.2f}x")
+
+    print("切分 15 秒音频：")
+    old = report("旧: bytes 切片", timeit.timeit(lambda: list(legacy_slice(pcm, segment)), number=n), n)
+    new = report("新: memoryview 切片",
+                 timeit.timeit(lambda: list(asr_protocol.slice_data(pcm, segment)), number=n), n)
+    print(f"  加速 {old / new:.2f}x")
+
+    print("解析响应帧：")
+    old = report("旧: 多次切片+gzip.decompress", timeit.timeit(lambda: legacy_parse(response), number=n), n)
+    new = report("新: parse_response", timeit.timeit(lambda: asr_protocol.parse_response(response), number=n), n)
+    print(f"  加速 {old / new:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""图片缩小解码微基准：完整解码 + LANCZOS / 平滑缩放 对比 ImageDecodeThread 的缩小解码路径
+
+对比的路径：
+    旧 PIL    完整解码后 LANCZOS 缩放（改造前的 ImageDecodeThread）
+    旧 Qt     QPixmap 完整解码后 SmoothTransformation 缩放（改造前的缩略图/查看器）
+    新 PIL    draft（JPEG 按 DCT 比例解码）+ reduce + 小目标双线性
+    新 Qt     QImageReader.setScaledSize
+
+用法（在板子上运行以得到 A53 上的真实数据）：
+    python -m benchmarks.bench_image_decode [--source 图片路径] [--number 20]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PIL import Image  # noqa: E402
+from PySide6.QtCore import Qt, QSize  # noqa: E402
+from PySide6.QtGui import QGuiApplication, QImage, QImageReader  # noqa: E402
+
+from threads.image_decode_thread import ImageDecodeThread  # noqa: E402
+
+TARGETS = (("缩略图", (220, 220)), ("查看器", (780, 430)))
+
+
+# ---------- 旧实现（照搬重构前的解码方式） ----------
+
+def legacy_pil(path, size):
+    with Image.open(path) as im:
+        im = im.convert('RGB')
+        im.load()
+        return im.resize(size, Image.Resampling.LANCZOS).tobytes("raw", "RGB")
+
+
+def legacy_qt(path, size):
+    image = QImage(path)
+    return image.scaled(QSize(*size), Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+
+# ---------- 新实现 ----------
+
+def reduced_pil(path, size):
+    with Image.open(path) as im:
+        return ImageDecodeThread.decode_pil(im, size)
+
+
+def reduced_qt(path, size):
+    return ImageDecodeThread.decode_qt(path, size)
+
+
+# ---------- 测试数据 ----------
+
+def make_sources(folder, size=(1280, 1280)):
+    """生成带渐变和噪声的测试图（纯色图会让编解码耗时失真）"""
+    import random
+    rnd = random.Random(0)
+    w, h = size
+    gradient = Image.linear_gradient('L').resize(size)
+    noise = Image.frombytes('L', size, bytes(rnd.getrandbits(6) for _ in range(w * h)))
+    im = Image.merge('RGB', (gradient, noise, gradient.transpose(Image.Transpose.ROTATE_90)))
+    sources = []
+    for fmt, ext, kwargs in (("JPEG", ".jpg", {"quality": 90}), ("PNG", ".png", {"compress_level": 1})):
+        path = os.path.join(folder, "source" + ext)
+        im.save(path, fmt, **kwargs)
+        sources.append(path)
+    return sources
+
+
+def fit(path, box):
+    w, h = Image.open(path).size
+    scale = min(box[0] / w, box[1] / h, 1.0)
+    return max(1, round(w * scale)), max(1, round(h * scale))
+
+
+def report(name, seconds, number):
+    per = seconds / number * 1000
+    print(f"  {name:<24}{per:10.1f} ms/张")
+    return per
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", action="append", help="使用指定图片（可重复），默认生成 1280px JPEG/PNG")
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+
+    app = QGuiApplication(sys.argv)  # noqa: F841  QImage 读取插件需要应用实例
+    n = args.number
+
+    with tempfile.TemporaryDirectory() as folder:
+        sources = args.source or make_sources(folder)
+        for path in sources:
+            print(f"{os.path.basename(path)} {Image.open(path).size}，每项 {n} 次")
+            for label, box in TARGETS:
+                size = fit(path, box)
+                print(f"{label} {size[0]}x{size[1]}：")
+                old = report("旧: PIL 完整解码+LANCZOS",
+                             timeit.timeit(lambda: legacy_pil(path, size), number=n), n)
+                report("旧: Qt 完整解码+平滑缩放",
+                       timeit.timeit(lambda: legacy_qt(path, size), number=n), n)
+                new = report("新: PIL draft+reduce",
+                             timeit.timeit(lambda: reduced_pil(path, size), number=n), n)
+                qt = report("新: QImageReader 缩小解码",
+                            timeit.timeit(lambda: reduced_qt(path, size), number=n), n)
+                print(f"  加速 PIL {old / new:.2f}x，Qt {old / qt:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""本地模拟 ASR WebSocket 服务 - 实现与 utils.asr_protocol 相同的二进制帧协议
+
+可配置往返时延（RTT）、抖动、丢包（按 TCP 重传时延建模）、服务端处理耗时
+与中间结果的返回方式，用于离线回归测试 ASRThread 的协议与流水线改动。
+
+单独运行（ASRThread 指向它：ASR_WS_URL=ws://127.0.0.1:8765）：
+    python -m benchmarks.mock_asr_server [--rtt-ms 60] [--jitter-ms 20] [--loss 0.01]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import websockets  # noqa: E402
+
+from utils import asr_protocol  # noqa: E402
+
+DEFAULT_TEXT = "一只在月球上弹吉他的橘猫赛博朋克风格"
+RESPONSE_HEADER = asr_protocol.build_header(asr_protocol.FULL_SERVER_RESPONSE)
+
+
+class MockASRServer:
+    """模拟火山引擎 v2 流式识别服务
+
+    每个连接处理一次请求：初始请求返回 code 1000，之后每个音频包返回一条
+    带 sequence 的响应（最后一包为负序号）。响应按 TCP 语义保序发送：
+    发送时刻 = max(上一条的发送时刻, 收到时刻 + 处理耗时 + RTT + 抖动 [+ 重传时延])。
+    """
+
+    def __init__(self, host="127.0.0.1", port=8765, rtt_ms=0, jitter_ms=0, loss=0.0,
+                 proc_ms=0, partial_every=1, connect_rtts=2, text=DEFAULT_TEXT, seed=None):
+        self.host = host
+        self.port = port
+        self.rtt = rtt_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.loss = loss
+        self.proc = proc_ms / 1000
+        self.partial_every = partial_every  # 每 N 个音频包带一次中间结果，0 表示只返回最终结果
+        self.connect_rtts = connect_rtts    # 握手耗时（TCP + TLS）折合的 RTT 数
+        self.text = text
+        self.compressor = asr_protocol.GzipCompressor(1)
+        self.random = random.Random(seed)
+        self.connections = 0
+        self._server = None
+        self._loop = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    # ---------- 时延模型 ----------
+
+    def _delay(self):
+        delay = self.rtt + self.random.uniform(-self.jitter, self.jitter)
+        if self.loss and self.random.random() < self.loss:
+            # TCP 不丢消息，丢包表现为一次重传超时
+            delay += max(0.2, 2 * self.rtt)
+        return max(0.0, delay)
+
+    async def _process_request(self, connection, request):
+        if self.connect_rtts and self.rtt:
+            await asyncio.sleep(self.connect_rtts * self._delay())
+        return None
+
+    # ---------- 帧编解码 ----------
+
+    def _response(self, sequence, text=None, code=1000):
+        msg = {'code': code, 'message': 'Success' if code == 1000 else 'error', 'sequence': sequence}
+        if text is not None:
+            msg['result'] = [{'text': text}]
+        payload = self.compressor.compress(json.dumps(msg, ensure_ascii=False).encode())
+        return b"".join((RESPONSE_HEADER, len(payload).to_bytes(4, 'big'), payload))
+
+    @staticmethod
+    def _parse_request(frame):
+        """返回 (消息类型, 是否最后一包, 负载)"""
+        view = memoryview(frame)
+        header_size = view[0] & 0x0f
+        message_type = view[1] >> 4
+        is_last = (view[1] & 0x0f) == asr_protocol.NEG_SEQUENCE
+        payload = view[header_size * 4 + 4:]
+        if view[2] & 0x0f == asr_protocol.GZIP:
+            payload = zlib.decompress(payload, asr_protocol.AUTO_WBITS)
+        return message_type, is_last, payload
+
+    # ---------- 连接处理 ----------
+
+    async def _handler(self, ws):
+        self.connections += 1
+        outbox = asyncio.Queue()
+        sender = asyncio.create_task(self._sender(ws, outbox))
+        last_due = 0.0
+
+        def schedule(frame):
+            nonlocal last_due
+            due = max(last_due, time.monotonic() + self.proc + self._delay())
+            last_due = due
+            outbox.put_nowait((due, frame))
+
+        try:
+            message_type, _, payload = self._parse_request(await ws.recv())
+            if message_type != asr_protocol.FULL_CLIENT_REQUEST:
+                schedule(self._response(1, code=1002))
+                return
+            request = json.loads(bytes(payload))
+            audio = request.get('audio', {})
+            bytes_per_char = max(1, audio.get('rate', 16000) * audio.get('bits', 16) // 8 // 5)
+            schedule(self._response(1))
+
+            n = 0
+            audio_bytes = 0
+            async for frame in ws:
+                message_type, is_last, payload = self._parse_request(frame)
+                if message_type != asr_protocol.AUDIO_ONLY_REQUEST:
+                    continue
+                n += 1
+                audio_bytes += len(payload)
+                # 随已收到的音频时长逐步"识别"出更多文字（约 200ms 一字）
+                heard = self.text[:audio_bytes // bytes_per_char + 1]
+                if is_last:
+                    schedule(self._response(-n, self.text))
+                    break
+                if self.partial_every and n % self.partial_every == 0:
+                    schedule(self._response(n, heard))
+                else:
+                    schedule(self._response(n, ""))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            outbox.put_nowait((0.0, None))
+            try:
+                await sender
+            except Exception:
+                pass
+
+    @staticmethod
+    async def _sender(ws, outbox):
+        while True:
+            due, frame = await outbox.get()
+            if frame is None:
+                return
+            wait = due - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await ws.send(frame)
+
+    # ---------- 启停 ----------
+
+    async def serve(self):
+        self._server = await websockets.serve(self._handler, self.host, self.port,
+                                              process_request=self._process_request)
+        if not self.port:
+            self.port = self._server.sockets[0].getsockname()[1]
+        return self._server
+
+    def start(self):
+        """在后台线程中启动服务，返回后即可连接"""
+        self._loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.serve())
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="mock-asr", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is None:
+            return
+
+        async def close():
+            self._server.close()
+            await self._server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(close(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rtt-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--loss", type=float, default=0.0)
+    parser.add_argument("--proc-ms", type=float, default=0)
+    parser.add_argument("--partial-every", type=int, default=1)
+    parser.add_argument("--text", default=DEFAULT_TEXT)
+    args = parser.parse_args()
+
+    server = MockASRServer(args.host, args.port, args.rtt_ms, args.jitter_ms, args.loss,
+                           args.proc_ms, args.partial_every, text=args.text)
+
+    async def run():
+        await server.serve()
+        print(f"模拟 ASR 服务已启动: {server.url}")
+        await asyncio.Future()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
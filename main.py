@@ -9,6 +9,13 @@ from PySide6.QtWidgets import QApplication
 from PySide6.QtCore import Qt, QSize
 from PySide6.QtGui import QScreen
 from main_window import MainWindow
+from utils.asr_connection import ASRConnectionManager
+from threads.capture_service import CaptureService
+from threads.generation_scheduler import GenerationScheduler
+from utils.net_client import NetClient
+from utils.http_cancel import check_backend_hook
+from utils.image_encoder import EncodePool
+from threads.image_decode_service import ImageDecodeService
 
 # 配置日志
 logging.basicConfig(
@@ -28,13 +35,15 @@ def setup_environment():
     # 优化Qt渲染
     os.environ['QT_QUICK_BACKEND'] = 'software'
     os.environ['QT_SCALE_FACTOR'] = '1'
-    # 减少内存使用
-    os.environ['QT_LOGGING_RULES'] = '*.debug=false'
+    # 减少内存使用；下载中的截断预览每次都会触发 JPEG 插件的“数据不完整”警告，一并关闭
+    os.environ['QT_LOGGING_RULES'] = '*.debug=false;qt.gui.imageio.jpeg.warning=false'
 
 
 def main():
     """主程序入口"""
     setup_environment()
+    # 生图请求的取消依赖 httpcore 内部属性，版本不兼容时启动即报错
+    check_backend_hook()
 
     app = QApplication(sys.argv)
     app.setApplicationName("AI语音生图")
@@ -57,6 +66,14 @@ def main():
         y = (screen_geometry.height() - 600) // 2
         window.move(x, y)
 
+    # 退出前关闭后台识别连接、释放麦克风、取消进行中的生图并关闭连接池
+    app.aboutToQuit.connect(lambda: ASRConnectionManager.get_instance().shutdown())
+    app.aboutToQuit.connect(lambda: CaptureService.get_instance().release())
+    app.aboutToQuit.connect(lambda: GenerationScheduler.get_instance().cancel_all())
+    app.aboutToQuit.connect(lambda: NetClient.get_instance().shutdown())
+    app.aboutToQuit.connect(lambda: EncodePool.get_instance().shutdown())
+    app.aboutToQuit.connect(lambda: ImageDecodeService.get_instance().shutdown())
+
     # 显示窗口
     window.show()
 
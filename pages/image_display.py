@@ -4,10 +4,12 @@
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                                QPushButton, QGridLayout, QDialog)
 from PySide6.QtCore import Qt, Signal, Slot, QTimer, QSize
-from PySide6.QtGui import QPixmap, QMovie
+from PySide6.QtGui import QPixmap, QMovie, QImage
 from styles.app_styles import AppStyles
-from threads.image_gen_thread import ImageGenThread
+from threads.generation_scheduler import GenerationScheduler
 from widgets.image_viewer import ImageViewer
+from threads.image_decode_service import ImageDecodeService
+from utils.image_pyramid import ImagePyramid
 from widgets.toast import Toast, show_toast_anywhere
 
 from utils.config import Config
@@ -30,6 +32,7 @@ class ImageThumbnail(QLabel):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.image_path = ""
+        self._ticket = None  # 进行中的后台解码请求
         self.setFixedSize(220, 220)
         self.setScaledContents(True)
         self.setStyleSheet(AppStyles.THUMBNAIL)
@@ -37,19 +40,42 @@ class ImageThumbnail(QLabel):
         self.setAlignment(Qt.AlignCenter)
 
     def set_image(self, path):
-        """设置图片"""
+        """设置图片（后台解码，完成后显示；传空路径即重置并取消未完成的解码）"""
+        service = ImageDecodeService.get_instance()
+        if self._ticket is not None:
+            service.cancel(self._ticket)
+            self._ticket = None
         self.image_path = path
-        if os.path.exists(path):
-            pixmap = QPixmap(path)
-            if not pixmap.isNull():
-                scaled = pixmap.scaled(self.size(), Qt.KeepAspectRatio,
-                                       Qt.SmoothTransformation)
-                self.setPixmap(scaled)
-            else:
-                self.setText("加载失败")
+        if path and os.path.exists(path):
+            # 优先解码生成时预先缩好的缩略图档
+            self._ticket = service.request(ImagePyramid.level_path(path, "thumb"),
+                                           (self.width(), self.height()), self._on_decoded)
         else:
+            self.clear()
             self.setText("加载中...")
 
+    def _on_decoded(self, image):
+        self._ticket = None
+        if image is None:
+            self.setText("加载失败")
+            return
+        self.setPixmap(QPixmap.fromImage(image))
+
+    def set_status(self, text):
+        """尚无图片和预览时显示该格的进度文字"""
+        if self.image_path or not self.pixmap().isNull():
+            return
+        self.setText(text)
+
+    def set_preview(self, width, height, data):
+        """显示下载中的低分辨率预览（最终图片到达后由 set_image 替换）"""
+        if self.image_path:
+            return
+        image = QImage(data, width, height, width * 3, QImage.Format_RGB888)
+        scaled = QPixmap.fromImage(image).scaled(self.size(), Qt.KeepAspectRatio,
+                                                 Qt.SmoothTransformation)
+        self.setPixmap(scaled)
+
     def mousePressEvent(self, event):
         """鼠标点击事件"""
         if event.button() == Qt.LeftButton and self.image_path:
@@ -67,7 +93,17 @@ class ImageDisplayPage(QWidget):
     def __init__(self):
         super().__init__()
         self.generated_images = []
-        self.generation_threads = []
+        self.viewer = None  # 复用的大图查看器，首次点开时创建
+        self.batch = None  # 当前生图批次，其他批次的迟到信号直接忽略
+        self.scheduler = GenerationScheduler.get_instance()
+        self.scheduler.job_result.connect(self.on_job_result)
+        self.scheduler.job_error.connect(self.on_job_error)
+        self.scheduler.job_preview.connect(self.on_job_preview)
+        self.scheduler.job_progress.connect(self.on_job_progress)
+        # 渐进模式：首张图片（或预览）到达即显示网格，各格独立更新
+        self.progressive = Config.get_instance().GEN_PROGRESSIVE_GRID
+        self.grid_shown = False
+        self.scheduler.batch_finished.connect(self.on_batch_finished)
         self.idle_timer = None
         self.setup_ui()
         self.setup_idle_timer()
@@ -176,7 +212,7 @@ class ImageDisplayPage(QWidget):
         self.back_btn.setFixedSize(100, 40)
         self.back_btn.setStyleSheet(AppStyles.BACK_BUTTON)
         self.back_btn.setCursor(Qt.PointingHandCursor)
-        self.back_btn.clicked.connect(self.back_clicked)
+        self.back_btn.clicked.connect(self.on_back)
         self.back_btn.setVisible(False)
         bottom_layout.addWidget(self.back_btn)
 
@@ -191,6 +227,7 @@ class ImageDisplayPage(QWidget):
         self.loading_container.setVisible(True)
         self.grid_container.setVisible(False)
         self.regenerate_btn.setVisible(False)
+        self.grid_shown = False
 
         if hasattr(self, 'loading_movie'):
             self.loading_movie.start()
@@ -199,18 +236,38 @@ class ImageDisplayPage(QWidget):
         self.generated_images = []
         for thumbnail in self.thumbnails:
             thumbnail.set_image("")
-            thumbnail.setText("生成中...")
-
-        # 启动4个生成线程
-        for i in range(4):
-            thread = ImageGenThread(prompt)
-            thread.result.connect(lambda path, idx=i: self.on_image_generated(path, idx))
-            thread.error.connect(lambda err, idx=i: self.on_generation_error(err, idx))
-            self.generation_threads.append(thread)
-            thread.start()
-
-            # 错开启动时间，减少服务器压力
-            QTimer.singleShot(i * 1000, thread.start)
+            thumbnail.setText("排队中..." if self.progressive else "生成中...")
+
+        # 交给共享调度器生成4张（线程池复用、错开启动、限流自动退避）
+        self.batch = self.scheduler.submit(prompt, count=len(self.thumbnails))
+
+    @Slot(int, int, str)
+    def on_job_result(self, batch_id, index, path):
+        if batch_id == self.batch:
+            self.on_image_generated(path, index)
+
+    @Slot(int, int, int, int, bytes)
+    def on_job_preview(self, batch_id, index, width, height, data):
+        if batch_id == self.batch:
+            self.thumbnails[index].set_preview(width, height, data)
+            if self.progressive:
+                self.show_grid()
+
+    @Slot(int, int, str)
+    def on_job_progress(self, batch_id, index, text):
+        if batch_id == self.batch:
+            self.thumbnails[index].set_status(text)
+
+    @Slot(int, int, str)
+    def on_job_error(self, batch_id, index, error):
+        if batch_id == self.batch:
+            self.on_generation_error(error, index)
+
+    @Slot(int)
+    def on_batch_finished(self, batch_id):
+        if batch_id == self.batch:
+            self.batch = None
+            self.check_all_completed()
 
     @Slot(str, int)
     def on_image_generated(self, path, index):
@@ -220,41 +277,46 @@ class ImageDisplayPage(QWidget):
         if path and os.path.exists(path):
             self.generated_images.append(path)
             self.thumbnails[index].set_image(path)
+            if self.progressive:
+                self.show_grid()
         else:
             self.thumbnails[index].setText("生成失败")
 
-        # 检查是否全部完成
-        self.check_all_completed()
-
     @Slot(str, int)
     def on_generation_error(self, error, index):
         """生成错误"""
         logger.error(f"图片 {index} 生成失败: {error}")
         self.thumbnails[index].setText("生成失败")
-        self.check_all_completed()
 
     def check_all_completed(self):
         """检查是否全部完成"""
-        # 检查所有线程是否完成
-        all_finished = all(not thread.isRunning() for thread in self.generation_threads)
-
-        if all_finished:
+        if self.batch is None:
             logger.info("所有图片生成完成")
-
-            # 停止加载动画
-            if hasattr(self, 'loading_movie'):
-                self.loading_movie.stop()
-
-            # 显示图片网格和按钮
-            self.loading_container.setVisible(False)
-            self.grid_container.setVisible(True)
-            self.regenerate_btn.setVisible(True)
-            self.back_btn.setVisible(True)
-            self.back_to_style_btn.setVisible(True)
+            self.show_grid()
 
             # 启动空闲定时器
             self.reset_idle_timer()
 
+    def show_grid(self):
+        """隐藏加载动画，显示图片网格和按钮（重复调用无副作用）"""
+        if self.grid_shown:
+            return
+        self.grid_shown = True
+
+        # 停止加载动画
+        if hasattr(self, 'loading_movie'):
+            self.loading_movie.stop()
+
+        # 显示图片网格和按钮
+        self.loading_container.setVisible(False)
+        self.grid_container.setVisible(True)
+        self.regenerate_btn.setVisible(True)
+        self.back_btn.setVisible(True)
+        self.back_to_style_btn.setVisible(True)
+
+        # 启动空闲定时器
+        self.reset_idle_timer()
+
     @Slot(str)
     def show_full_image(self, path):
         """显示大图 - 使用自定义图片查看器"""
@@ -267,10 +329,13 @@ class ImageDisplayPage(QWidget):
         except ValueError:
             current_index = 0
         
-        # 创建自定义图片查看器
-        viewer = ImageViewer(self.generated_images, current_index, self)
-        viewer.save_requested.connect(self.on_image_save_requested)
-        viewer.exec()
+        # 查看器只创建一次，之后复用（保留已解码图片的缓存）
+        if self.viewer is None:
+            self.viewer = ImageViewer(self.generated_images, current_index, self)
+            self.viewer.save_requested.connect(self.on_image_save_requested)
+        else:
+            self.viewer.set_images(self.generated_images, current_index)
+        self.viewer.exec()
     
     @Slot(str)
     def on_image_save_requested(self, path):
@@ -306,9 +371,16 @@ class ImageDisplayPage(QWidget):
             parent = QApplication.activeWindow() or self.window()
             Toast.show_toast(parent, f"保存失败：{e}", duration=2200, bg="rgba(231, 76, 60, 220)")
 
+    @Slot()
+    def on_back(self):
+        """返回到语音识别页面（取消仍在生成的图片）"""
+        self.stop_all_threads()
+        self.back_clicked.emit()
+
     @Slot()
     def back_to_style(self):
-        """返回到风格选择页面"""
+        """返回到风格选择页面（取消仍在生成的图片）"""
+        self.stop_all_threads()
         self.back_to_style_clicked.emit()
 
     def setup_idle_timer(self):
@@ -326,6 +398,10 @@ class ImageDisplayPage(QWidget):
 
     def on_idle_timeout(self):
         """空闲超时处理"""
+        if self.batch is not None:
+            # 渐进模式下网格已显示但仍有图片在生成，等生成结束再计时
+            self.reset_idle_timer()
+            return
         logger.info("空闲超时，返回风格选择并删除生成图片")
         self.delete_generated_images()
         self.back_to_style_clicked.emit()
@@ -333,13 +409,12 @@ class ImageDisplayPage(QWidget):
     def delete_generated_images(self):
         """删除生成的图片"""
         for image_path in self.generated_images:
-            try:
-                if os.path.exists(image_path):
-                    os.remove(image_path)
-                    logger.info(f"已删除图片: {image_path}")
-            except Exception as e:
-                logger.error(f"删除图片失败 {image_path}: {e}")
+            # 连同各档尺寸文件和清单一起删除
+            ImagePyramid.remove(image_path)
+            logger.info(f"已删除图片: {image_path}")
         self.generated_images = []
+        if self.viewer is not None:
+            self.viewer.clear_cache()
 
     def mousePressEvent(self, event):
         """鼠标点击事件 - 重置空闲定时器"""
@@ -358,10 +433,7 @@ class ImageDisplayPage(QWidget):
         self.regenerate_clicked.emit()
 
     def stop_all_threads(self):
-        """停止所有线程"""
-        for thread in self.generation_threads:
-            if thread.isRunning():
-                thread.stop()
-                thread.quit()
-                thread.wait()
-        self.generation_threads.clear()
\ No newline at end of file
+        """取消当前批次（不等待，运行中的任务收到取消标志后自行退出）"""
+        batch, self.batch = self.batch, None
+        if batch is not None:
+            self.scheduler.cancel(batch)
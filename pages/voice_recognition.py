@@ -10,8 +10,14 @@ from widgets.animated_label import AnimatedLabel
 from widgets.borderless_button import BorderlessButton
 from threads.record_thread import RecordThread
 from threads.asr_thread import ASRThread
+from threads.capture_service import CaptureService
+from utils.audio_buffer import AudioBuffer
+from utils.asr_connection import ASRConnectionManager
+from utils.local_asr import LocalASREngine
+from utils.config import Config
 import os
 import logging
+import warnings
 
 logger = logging.getLogger(__name__)
 
@@ -40,7 +46,9 @@ class VoiceRecognitionPage(QWidget):
         self.recognized_text = ""
         self.record_thread = None
         self.asr_thread = None
+        self._retired_threads = []  # 已取消、仍在后台收尾的线程，结束前保持引用
         self.is_recording = False
+        self.capture = None  # 常驻采集服务，页面可见时打开设备
         
         # 安装全局事件过滤器来彻底隐藏焦点框
         self.global_focus_filter = GlobalFocusFilter()
@@ -256,7 +264,6 @@ class VoiceRecognitionPage(QWidget):
         if style_name:
             self.current_style_name = style_name
         else:
-            from utils.config import Config
             config = Config.get_instance()
             for s in config.STYLES:
                 if s.get("prompt") == style:
@@ -266,6 +273,12 @@ class VoiceRecognitionPage(QWidget):
                 self.current_style_name = "自定义风格"
 
         self.style_label.setText(f"当前风格：{self.current_style_name}")
+
+        # 后台预热识别连接，用户开口前完成 DNS/TCP/TLS 握手
+        ASRConnectionManager.get_instance().prewarm()
+        # 与云端竞速时离线模型必须就绪；fallback 模式在需要时才加载
+        if Config.get_instance().ASR_LOCAL_MODE == "race":
+            LocalASREngine.get_instance().preload()
         
         # 设置背景图片
         if background_image:
@@ -340,6 +353,30 @@ class VoiceRecognitionPage(QWidget):
             # 重新设置背景图片以适应新尺寸
             self.set_background_image(self.current_background)
 
+    def showEvent(self, event):
+        """页面显示：打开麦克风常驻采集，按下按钮时无需等待设备启动"""
+        super().showEvent(event)
+        config = Config.get_instance()
+        if config.CAPTURE_PERSISTENT and config.RECORD_IN_MEMORY:
+            if self.capture is None:
+                self.capture = CaptureService.get_instance()
+                self.capture.error.connect(self.on_capture_error)
+            self.capture.acquire()
+
+    def hideEvent(self, event):
+        """页面隐藏：释放麦克风"""
+        super().hideEvent(event)
+        if self.capture is not None:
+            self.capture.release()
+
+    @Slot(str)
+    def on_capture_error(self, error):
+        """常驻采集打不开设备：提示用户（录音时会退回单独打开设备）"""
+        logger.warning(f"常驻采集失败: {error}")
+        if not self.is_recording:
+            self.recording_hint.setText(f"麦克风不可用: {error}")
+            self.recording_hint.setStyleSheet(AppStyles.STATUS_HINT)
+
     @Slot()
     def start_recording(self):
         """开始录音"""
@@ -359,12 +396,49 @@ class VoiceRecognitionPage(QWidget):
         self.recording_hint.setStyleSheet(AppStyles.STATUS_HINT_ACTIVE)
         self.recording_timer.start(500)
 
+        config = Config.get_instance()
+        if config.ASR_STREAMING:
+            self.start_streaming_recognition()
+            return
+
+        # 上一轮的线程可能仍在收尾（等待识别结果），先停止并保留引用，避免运行中的 QThread 被销毁
+        self._retire_thread(self.record_thread)
+        self._retire_thread(self.asr_thread)
+        self.asr_thread = None
+
         # 启动录音线程
-        self.record_thread = RecordThread()
+        if config.RECORD_IN_MEMORY:
+            self.record_thread = RecordThread(buffer=AudioBuffer(max_seconds=config.MAX_RECORD_TIME),
+                                              capture=self.capture)
+            self.record_thread.captured.connect(self.on_audio_captured)
+            self.record_thread.auto_stopped.connect(self.stop_recording)
+        else:
+            self.record_thread = RecordThread()
         self.record_thread.finished.connect(self.on_recording_finished)
         self.record_thread.error.connect(self.on_recording_error)
         self.record_thread.start()
 
+    def start_streaming_recognition(self):
+        """流式模式：录音线程与识别线程共享缓冲，同时启动"""
+        buffer = AudioBuffer(max_seconds=Config.get_instance().MAX_RECORD_TIME)
+
+        # 上一轮的线程可能仍在等待最终结果，先停止并保留引用，避免运行中的 QThread 被销毁
+        self._retire_thread(self.record_thread)
+        self._retire_thread(self.asr_thread)
+
+        self.record_thread = RecordThread(buffer=buffer, capture=self.capture)
+        self.record_thread.auto_stopped.connect(self.stop_recording)
+        self.record_thread.finished.connect(self.on_recording_finished)
+        self.record_thread.error.connect(self.on_recording_error)
+
+        self.asr_thread = ASRThread(audio_buffer=buffer, streaming=True)
+        self.asr_thread.partial_result.connect(self.on_partial_result)
+        self.asr_thread.result.connect(self.on_recognition_result)
+        self.asr_thread.error.connect(self.on_recognition_error)
+
+        self.asr_thread.start()
+        self.record_thread.start()
+
     @Slot()
     def stop_recording(self):
         """停止录音"""
@@ -388,6 +462,9 @@ class VoiceRecognitionPage(QWidget):
     def on_recording_finished(self, audio_path):
         """录音完成"""
         if not audio_path:
+            # 流式模式下识别线程已在运行，一并停止
+            if self.asr_thread:
+                self.asr_thread.stop()
             self.recording_hint.setText("录音失败，请重试")
             self.recording_hint.setStyleSheet(AppStyles.STATUS_HINT_ERROR)
             return
@@ -395,11 +472,24 @@ class VoiceRecognitionPage(QWidget):
         logger.info(f"录音完成: {audio_path}")
 
         # 启动识别线程
+        self._retire_thread(self.asr_thread)
         self.asr_thread = ASRThread(audio_path)
         self.asr_thread.result.connect(self.on_recognition_result)
         self.asr_thread.error.connect(self.on_recognition_error)
         self.asr_thread.start()
 
+    @Slot(object)
+    def on_audio_captured(self, buffer):
+        """录音完成（内存模式）"""
+        logger.info(f"录音完成: {buffer.duration:.1f}秒（内存）")
+
+        # 启动识别线程
+        self._retire_thread(self.asr_thread)
+        self.asr_thread = ASRThread(audio_buffer=buffer)
+        self.asr_thread.result.connect(self.on_recognition_result)
+        self.asr_thread.error.connect(self.on_recognition_error)
+        self.asr_thread.start()
+
     @Slot(str)
     def on_recording_error(self, error):
         """录音错误"""
@@ -407,6 +497,14 @@ class VoiceRecognitionPage(QWidget):
         self.recording_hint.setText(f"录音失败: {error}")
         self.mic_button.setStyleSheet(AppStyles.MIC_BUTTON_CLEAN)
 
+    @Slot(str)
+    def on_partial_result(self, text):
+        """流式中间结果：实时显示"""
+        if not text.strip():
+            return
+        self.result_container.setVisible(True)
+        self.animated_label.show_partial(text)
+
     @Slot(str)
     def on_recognition_result(self, text):
         """识别结果"""
@@ -446,19 +544,33 @@ class VoiceRecognitionPage(QWidget):
         if self.recognized_text:
             self.next_clicked.emit(self.recognized_text)
 
+    def _retire_thread(self, thread):
+        """请求线程停止并断开其信号，迟到的结果不会再影响页面"""
+        self._retired_threads = [t for t in self._retired_threads if t.isRunning()]
+        if thread is None or not thread.isRunning():
+            return
+        thread.stop()
+        for name in ("result", "partial_result", "error", "finished", "captured", "auto_stopped"):
+            signal = getattr(thread, name, None)
+            if signal is None:
+                continue
+            try:
+                # 没有连接的信号断开时 PySide 会发 RuntimeWarning，忽略
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", RuntimeWarning)
+                    signal.disconnect()
+            except (RuntimeError, TypeError):
+                pass
+        self._retired_threads.append(thread)
+
     def reset(self):
         """重置页面"""
-        # 停止录音和识别线程
+        # 停止录音和识别线程（不在 GUI 线程等待，线程收到停止请求后自行退出）
         self.is_recording = False
-        if hasattr(self, 'record_thread') and self.record_thread and self.record_thread.isRunning():
-            self.record_thread.stop()
-            self.record_thread.wait(1000)  # 等待最多1秒
-            self.record_thread = None
-            
-        if hasattr(self, 'asr_thread') and self.asr_thread and self.asr_thread.isRunning():
-            self.asr_thread.terminate()
-            self.asr_thread.wait(1000)  # 等待最多1秒
-            self.asr_thread = None
+        self._retire_thread(self.record_thread)
+        self._retire_thread(self.asr_thread)
+        self.record_thread = None
+        self.asr_thread = None
             
         # 停止定时器
         if hasattr(self, 'recording_timer'):
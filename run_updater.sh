@@ -19,10 +19,10 @@ if [ ! -f "$VENV_PATH/bin/python" ]; then
     exit 1
 fi
 
-# 检查是否安装了requests
-if ! "$VENV_PATH/bin/python" -c "import requests" 2>/dev/null; then
-    echo "正在安装依赖 requests..."
-    "$VENV_PATH/bin/pip" install requests
+# 检查是否安装了httpx
+if ! "$VENV_PATH/bin/python" -c "import httpx" 2>/dev/null; then
+    echo "正在安装依赖 httpx..."
+    "$VENV_PATH/bin/pip" install httpx
 fi
 
 # 运行自动更新程序
@@ -1,6 +1,4 @@
 """语音识别线程 - 增强安全性和错误处理"""
-import json
-import gzip
 import uuid
 import asyncio
 import websockets
@@ -10,25 +8,50 @@ import logging
 from io import BytesIO
 from PySide6.QtCore import QThread, Signal
 from utils.config import Config
+from utils.asr_connection import ASRConnectionManager
+from utils.audio_codec import create_encoder
+from utils.local_asr import LocalASREngine
+from utils import asr_protocol
 
 logger = logging.getLogger(__name__)
 
 
+class _Attempt:
+    """一路识别请求（主路或对冲备路）"""
+
+    def __init__(self, name, url, cluster):
+        self.name = name
+        self.url = url
+        self.cluster = cluster
+        self.first_response = asyncio.Event()
+
+
 class ASRThread(QThread):
     """语音识别线程"""
 
     result = Signal(str)  # 识别结果
+    partial_result = Signal(str)  # 流式中间结果
     error = Signal(str)  # 错误信息
 
-    def __init__(self, audio_path):
+    def __init__(self, audio_path=None, audio_buffer=None, streaming=False):
         super().__init__()
         self.audio_path = audio_path
+        self.audio_buffer = audio_buffer  # AudioBuffer，内存交接，不经过文件
+        self.streaming = streaming  # True 时录音仍在进行，边录边读 audio_buffer
         self.config = Config.get_instance()
+        self.connections = ASRConnectionManager.get_instance()
         self._stop_requested = False
 
         # WebSocket超时设置
         self.ws_timeout = self.config.WS_TIMEOUT
         self.max_retries = self.config.MAX_RETRIES
+        self.max_inflight = max(1, self.config.ASR_MAX_INFLIGHT)
+        self.packer = asr_protocol.ASRPacker(self.config.ASR_GZIP_LEVEL)
+        self._partial_owner = None  # 多路识别时负责输出中间结果的一路
+        self._cloud_ready = None    # 云端任一路收到首个响应时置位
+        # 最近一次识别各阶段相对开始时刻的耗时（秒）：connect / first_response / first_result / final
+        self.timings = {}
+        self._started = 0.0
 
     def stop(self):
         """停止识别"""
@@ -40,6 +63,13 @@ class ASRThread(QThread):
             if self._stop_requested:
                 return
 
+            if self.audio_buffer is not None:
+                if self.streaming:
+                    self.run_streaming()
+                else:
+                    self.run_buffer()
+                return
+
             # 等待文件写入完成
             time.sleep(0.1)
 
@@ -67,22 +97,56 @@ class ASRThread(QThread):
 
             # 执行识别
             logger.info("🔍 正在识别语音...")
-            text = asyncio.run(self.recognize(audio_data))
-
-            if self._stop_requested:
-                return
-
-            if text and text.strip():
-                logger.info(f"✅ 识别成功: {text}")
-                self.result.emit(text.strip())
-            else:
-                self.error.emit("未识别到有效语音内容")
+            text = self.connections.run(self.recognize(audio_data))
+            self.emit_text(text)
 
         except Exception as e:
             if not self._stop_requested:
                 logger.error(f"识别错误: {e}")
                 self.error.emit(f"识别错误：{str(e)}")
 
+    def run_buffer(self):
+        """内存缓冲识别：录音已结束，按元数据校验后直接发送"""
+        if not self.validate_audio_buffer(self.audio_buffer):
+            return
+
+        logger.info("🔍 正在识别语音...")
+        text = self.connections.run(self.recognize_buffer(self.audio_buffer))
+        self.emit_text(text)
+
+    def run_streaming(self):
+        """流式识别：录音进行中即开始上传"""
+        logger.info("🔍 流式识别中...")
+        text = self.connections.run(self.recognize_stream(self.audio_buffer))
+
+        if self._stop_requested:
+            return
+
+        duration = self.audio_buffer.duration
+        if duration < self.config.MIN_RECORD_TIME:
+            self.error.emit(f"录音时间太短（{duration:.1f}秒），需要至少{self.config.MIN_RECORD_TIME}秒")
+            return
+
+        self.emit_text(text)
+
+    def emit_text(self, text):
+        """发出最终识别结果"""
+        if self._stop_requested:
+            return
+
+        if text and text.strip():
+            logger.info(f"✅ 识别成功: {text}")
+            self.result.emit(text.strip())
+        else:
+            self.error.emit("未识别到有效语音内容")
+
+    def validate_audio_buffer(self, buffer):
+        """按缓冲元数据校验音频，无需重新解析"""
+        if buffer.size == 0:
+            self.error.emit("录音数据为空")
+            return False
+        return self.check_audio_params(buffer.channels, buffer.rate, buffer.sampwidth, buffer.nframes)
+
     def validate_audio_format(self, audio_data):
         """校验音频格式"""
         try:
@@ -98,35 +162,201 @@ class ASRThread(QThread):
                 nframes = wf.getnframes()
                 wf.close()
 
-            # 检查音频长度
-            duration = nframes / framerate if framerate > 0 else 0
-            if duration < self.config.MIN_RECORD_TIME:
-                self.error.emit(f"录音时间太短（{duration:.1f}秒），需要至少{self.config.MIN_RECORD_TIME}秒")
-                return False
-            if duration > self.config.MAX_RECORD_TIME:
-                self.error.emit(f"录音时间太长（{duration:.1f}秒），最多{self.config.MAX_RECORD_TIME}秒")
-                return False
-
-            # 要求：单声道、16000Hz采样率、16位深
-            if nchannels != 1:
-                self.error.emit(f"音频格式错误：需单声道，实际{nchannels}声道")
-                return False
-            if framerate != 16000:
-                self.error.emit(f"音频格式错误：需16000Hz，实际{framerate}Hz")
-                return False
-            if sampwidth != 2:
-                self.error.emit(f"音频格式错误：需16位深，实际{sampwidth * 8}位深")
-                return False
-
-            logger.info(f"音频验证通过: {duration:.1f}秒, {nchannels}声道, {framerate}Hz, {sampwidth*8}位")
-            return True
+            return self.check_audio_params(nchannels, framerate, sampwidth, nframes)
 
         except Exception as e:
             self.error.emit(f"音频格式解析失败：{str(e)}")
             return False
 
+    def check_audio_params(self, nchannels, framerate, sampwidth, nframes):
+        """校验时长与格式参数"""
+        # 检查音频长度
+        duration = nframes / framerate if framerate > 0 else 0
+        if duration < self.config.MIN_RECORD_TIME:
+            self.error.emit(f"录音时间太短（{duration:.1f}秒），需要至少{self.config.MIN_RECORD_TIME}秒")
+            return False
+        if duration > self.config.MAX_RECORD_TIME:
+            self.error.emit(f"录音时间太长（{duration:.1f}秒），最多{self.config.MAX_RECORD_TIME}秒")
+            return False
+
+        # 要求：单声道、16000Hz采样率、16位深
+        if nchannels != 1:
+            self.error.emit(f"音频格式错误：需单声道，实际{nchannels}声道")
+            return False
+        if framerate != 16000:
+            self.error.emit(f"音频格式错误：需16000Hz，实际{framerate}Hz")
+            return False
+        if sampwidth != 2:
+            self.error.emit(f"音频格式错误：需16位深，实际{sampwidth * 8}位深")
+            return False
+
+        logger.info(f"音频验证通过: {duration:.1f}秒, {nchannels}声道, {framerate}Hz, {sampwidth*8}位")
+        return True
+
     async def recognize(self, audio_data):
-        """异步识别"""
+        """异步识别（完整 WAV 数据）"""
+        async def audio_chunks():
+            segment_size = self.calculate_segment_size(audio_data)
+            for chunk, is_last in self.slice_data(audio_data, segment_size):
+                yield chunk, is_last
+
+        def pcm_chunks():
+            with BytesIO(audio_data) as f, wave.open(f, 'rb') as wf:
+                rate = wf.getframerate()
+                pcm = wf.readframes(wf.getnframes())
+
+            async def chunks():
+                for chunk, is_last in self.slice_data(pcm, rate * 2 // 5):
+                    yield chunk, is_last
+            return chunks(), rate
+
+        return await self._run_recognition(
+            lambda: (audio_chunks(), {'format': 'wav'}, True), pcm_chunks)
+
+    async def recognize_buffer(self, buffer):
+        """异步识别（内存缓冲）：PCM 上传时首包前置按元数据生成的 WAV 头"""
+        def make_chunks():
+            encoder = create_encoder(self.config.ASR_AUDIO_CODEC, wav=True,
+                                     bitrate_kbps=self.config.ASR_OPUS_BITRATE)
+            segment_size = buffer.bytes_per_second * 15  # 15秒分片
+            audio_chunks = encoder.transform(buffer, buffer.chunks(segment_size))
+            return audio_chunks, encoder.audio_params(buffer), encoder.compressible
+
+        return await self._run_recognition(
+            make_chunks, lambda: (buffer.chunks(buffer.bytes_per_second // 5), buffer.rate))
+
+    async def recognize_stream(self, stream):
+        """异步流式识别：按固定时长分包，边录边发"""
+        def make_chunks():
+            encoder = create_encoder(self.config.ASR_AUDIO_CODEC,
+                                     bitrate_kbps=self.config.ASR_OPUS_BITRATE)
+            segment_size = int(stream.bytes_per_second * self.config.ASR_STREAM_SEGMENT_MS / 1000)
+            segment_size -= segment_size % (stream.channels * stream.sampwidth)
+            audio_chunks = encoder.transform(stream, stream.chunks(segment_size))
+            return audio_chunks, encoder.audio_params(stream), encoder.compressible
+
+        return await self._run_recognition(
+            make_chunks, lambda: (stream.chunks(stream.bytes_per_second // 5), stream.rate),
+            streaming=True)
+
+    async def _run_recognition(self, make_chunks, make_pcm_chunks, streaming=False):
+        """识别入口：重置本次识别状态并记录各阶段耗时"""
+        self._partial_owner = None
+        self._cloud_ready = asyncio.Event()
+        self._started = time.monotonic()
+        self.timings = {}
+        text = await self._recognize_with_local(make_chunks, make_pcm_chunks, streaming)
+        self._mark("final")
+        logger.info("⏱️ 识别耗时: " + ", ".join(f"{k} {v * 1000:.0f}ms" for k, v in self.timings.items()))
+        return text
+
+    async def _recognize_with_local(self, make_chunks, make_pcm_chunks, streaming=False):
+        """云端识别，按 ASR_LOCAL_MODE 接入离线引擎
+
+        fallback：云端在 ASR_LOCAL_BUDGET 秒内未收到首个响应或识别失败时启动离线识别；
+        race：两者同时开始；先得到有效结果者胜出，另一路取消。
+        """
+        mode = self.config.ASR_LOCAL_MODE
+        local = LocalASREngine.get_instance() if mode in ("fallback", "race") else None
+        if local is None or not local.available():
+            return await self._recognize_hedged(make_chunks, streaming)
+
+        def start_local():
+            pcm_chunks, rate = make_pcm_chunks()
+            on_partial = (lambda text: self._emit_partial("local", text)) if streaming else None
+            return asyncio.create_task(local.recognize(pcm_chunks, rate, on_partial))
+
+        cloud_task = asyncio.create_task(self._recognize_hedged(make_chunks, streaming))
+        local_task = start_local() if mode == "race" else None
+        tasks = {cloud_task} | ({local_task} if local_task else set())
+
+        if local_task is None:
+            ready = asyncio.create_task(self._cloud_ready.wait())
+            try:
+                await asyncio.wait({cloud_task, ready}, timeout=self.config.ASR_LOCAL_BUDGET,
+                                   return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                ready.cancel()
+            if not self._cloud_ready.is_set() and not cloud_task.done() and not self._stop_requested:
+                logger.warning(f"☁️ 云端{self.config.ASR_LOCAL_BUDGET}秒内未响应，同时启动离线识别")
+                local_task = start_local()
+                tasks.add(local_task)
+
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        text = task.result()
+                    except Exception as e:
+                        logger.error(f"离线识别错误: {e}")
+                        text = None
+                    if text:
+                        if task is local_task:
+                            logger.info("💻 采用离线识别结果")
+                        return text
+                    if task is cloud_task and local_task is None and not self._stop_requested:
+                        logger.warning("☁️ 云端识别失败，切换到离线识别")
+                        local_task = start_local()
+                        tasks.add(local_task)
+                        pending.add(local_task)
+            return None
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _recognize_hedged(self, make_chunks, streaming=False):
+        """主路识别；开启对冲时，首个响应迟迟未到则向备用集群重发同一段音频，先得到有效结果者胜出
+
+        make_chunks 每次调用返回一组新的 (audio_chunks, audio_params, compress)，
+        两路各自独立读取同一缓冲。
+        """
+        primary = _Attempt("primary", self.config.ASR_WS_URL, self.config.ASR_CLUSTER)
+        if not self.config.ASR_HEDGE:
+            return await self._recognize(primary, *make_chunks(), streaming=streaming)
+
+        primary_task = asyncio.create_task(
+            self._recognize(primary, *make_chunks(), streaming=streaming))
+        tasks = {primary_task}
+
+        delay = self.connections.hedge_delay()
+        first_response = asyncio.create_task(primary.first_response.wait())
+        try:
+            await asyncio.wait({primary_task, first_response}, timeout=delay,
+                               return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            first_response.cancel()
+
+        try:
+            if not primary.first_response.is_set() and not self._stop_requested:
+                if primary_task.done() and primary_task.result():
+                    return primary_task.result()
+
+                logger.warning(f"⏱️ {delay:.1f}秒内未收到首个响应，向备用集群发起对冲请求")
+                backup = _Attempt("backup",
+                                  self.config.ASR_BACKUP_WS_URL or self.config.ASR_WS_URL,
+                                  self.config.ASR_BACKUP_CLUSTER or self.config.ASR_CLUSTER)
+                tasks.add(asyncio.create_task(
+                    self._recognize(backup, *make_chunks(), streaming=streaming)))
+
+            pending = tasks
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    text = task.result()
+                    if text:
+                        return text
+            return None
+        finally:
+            # 取消落后的一路，其 finally 会关闭连接
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _recognize(self, attempt, audio_chunks, audio_params, compress=True, streaming=False):
+        """发送初始请求与音频分片，返回最终文本"""
         if self._stop_requested:
             return None
 
@@ -136,7 +366,7 @@ class ASRThread(QThread):
         request_params = {
             'app': {
                 'appid': self.config.ASR_APP_ID,
-                'cluster': self.config.ASR_CLUSTER,
+                'cluster': attempt.cluster,
                 'token': self.config.ASR_TOKEN,
             },
             'user': {'uid': 'image_gen_app'},
@@ -158,44 +388,31 @@ class ASRThread(QThread):
                 'codec': 'raw'
             }
         }
+        request_params['audio'].update(audio_params)
 
         ws = None
         try:
-            # WebSocket连接 - 增加重试
-            header = {'Authorization': f'Bearer; {self.config.ASR_TOKEN}'}
-
-            for attempt in range(self.max_retries):
-                if self._stop_requested:
-                    return None
-
-                try:
-                    ws = await asyncio.wait_for(
-                        websockets.connect(
-                            self.config.ASR_WS_URL,
-                            additional_headers=header,
-                            ping_interval=10,
-                            ping_timeout=5,
-                            close_timeout=10
-                        ),
-                        timeout=10
-                    )
-                    break
-                except Exception as e:
-                    logger.warning(f"WebSocket连接失败 (尝试 {attempt+1}/{self.max_retries}): {e}")
-                    if attempt == self.max_retries - 1:
-                        raise e
-                    await asyncio.sleep(1)
+            started = time.monotonic()
+            if attempt.name == "primary":
+                # 取用预热好的连接（无则新建）
+                ws = await self.connections.acquire()
+            else:
+                ws = await self.connections.connect(attempt.url)
+            self._mark("connect")
 
-            if not ws:
-                raise Exception("无法建立WebSocket连接")
+            if self._stop_requested:
+                return None
 
             # 发送初始请求
-            payload_bytes = gzip.compress(json.dumps(request_params).encode())
-            full_request = bytearray(self.generate_full_default_header())
-            full_request.extend(len(payload_bytes).to_bytes(4, 'big'))
-            full_request.extend(payload_bytes)
+            full_request = self.packer.pack_full_request(request_params)
 
-            await ws.send(full_request)
+            try:
+                await ws.send(full_request)
+            except websockets.exceptions.ConnectionClosed:
+                # 预热连接已被服务端关闭，重新建连一次
+                logger.warning("预热连接已失效，重新连接")
+                ws = await self.connections.connect(attempt.url)
+                await ws.send(full_request)
 
             if self._stop_requested:
                 return None
@@ -210,41 +427,27 @@ class ASRThread(QThread):
                     logger.error(f"❌ 服务器初始化失败：{error_msg}")
                     return None
 
-            # 发送音频数据分片
-            final_result = ""
-            segment_size = self.calculate_segment_size(audio_data)
-
-            for seq, (chunk, is_last) in enumerate(self.slice_data(audio_data, segment_size), 1):
-                if self._stop_requested:
-                    return None
-
-                chunk_bytes = gzip.compress(chunk)
-
-                # 选择正确的header
-                if is_last:
-                    header = self.generate_last_audio_default_header()
-                else:
-                    header = self.generate_audio_default_header()
-
-                audio_request = bytearray(header)
-                audio_request.extend(len(chunk_bytes).to_bytes(4, 'big'))
-                audio_request.extend(chunk_bytes)
-
-                await ws.send(audio_request)
-                res = await asyncio.wait_for(ws.recv(), timeout=self.ws_timeout)
-                segment_result = self.parse_response(res)
-
-                # 处理识别结果
-                if 'payload_msg' in segment_result and 'result' in segment_result['payload_msg']:
-                    result_data = segment_result['payload_msg']['result']
-
-                    if isinstance(result_data, list) and len(result_data) > 0:
-                        text_content = result_data[0].get('text', '')
-                        if text_content:
-                            final_result = text_content
-                            logger.info(f"  片段{seq}: {text_content[:30]}...")
-                    elif isinstance(result_data, str):
-                        final_result = result_data
+            attempt.first_response.set()
+            self._mark("first_response")
+            if self._cloud_ready is not None:
+                self._cloud_ready.set()
+            if attempt.name == "primary":
+                self.connections.record_first_response(time.monotonic() - started)
+
+            # 发送与接收并行：发送方受在途窗口限制，接收方按确认释放窗口
+            send_state = {'sent': 0, 'last_seq': None}
+            window = asyncio.Semaphore(self.max_inflight)
+            send_task = asyncio.create_task(self._send_audio(ws, audio_chunks, window, send_state, compress))
+            recv_task = asyncio.create_task(self._receive_results(ws, window, send_state, streaming, attempt))
+            try:
+                await asyncio.wait({send_task, recv_task}, return_when=asyncio.FIRST_EXCEPTION)
+                if not recv_task.done():
+                    send_task.result()  # 发送失败，抛出异常
+                final_result = recv_task.result()
+            finally:
+                for task in (send_task, recv_task):
+                    if not task.done():
+                        task.cancel()
 
             return final_result if final_result else None
 
@@ -261,6 +464,92 @@ class ASRThread(QThread):
                 except Exception:
                     pass
 
+    async def _send_audio(self, ws, audio_chunks, window, send_state, compress=True):
+        """发送方：按序发送音频分片，在途分片数达到窗口上限时等待确认"""
+        seq = 0
+        async for chunk, is_last in audio_chunks:
+            if self._stop_requested:
+                return
+
+            await window.acquire()
+            seq += 1
+
+            # 已压缩的编码（如 Opus）不再 gzip
+            audio_request = self.packer.pack_audio(chunk, is_last, compress)
+            await ws.send(audio_request)
+            send_state['sent'] = seq
+            if is_last:
+                send_state['last_seq'] = seq
+                return
+
+    async def _receive_results(self, ws, window, send_state, streaming, attempt):
+        """接收方：跟踪确认序号，收到最后一包的响应即返回最终文本"""
+        final_result = ""
+        acked = 0
+
+        while not self._stop_requested:
+            try:
+                res = await asyncio.wait_for(ws.recv(), timeout=self.ws_timeout)
+            except asyncio.TimeoutError:
+                # 流式录音中没有在途分片时，等待并不算超时
+                if send_state['last_seq'] is None and acked >= send_state['sent']:
+                    continue
+                raise
+
+            segment_result = self.parse_response(res)
+            if 'error' in segment_result:
+                raise Exception(segment_result['error'])
+
+            payload_msg = segment_result.get('payload_msg')
+            if 'code' in segment_result:
+                message = payload_msg.get('message') if isinstance(payload_msg, dict) else payload_msg
+                raise Exception(f"服务器错误 {segment_result['code']}: {message}")
+            if isinstance(payload_msg, dict) and payload_msg.get('code', 1000) != 1000:
+                raise Exception(payload_msg.get('message', '未知错误'))
+
+            acked += 1
+            window.release()
+
+            # 序号优先取确认响应头中的 seq，其次取 payload 中的 sequence
+            seq = segment_result.get('seq')
+            if seq is None and isinstance(payload_msg, dict):
+                seq = payload_msg.get('sequence')
+
+            # 处理识别结果
+            if isinstance(payload_msg, dict) and 'result' in payload_msg:
+                result_data = payload_msg['result']
+
+                if isinstance(result_data, list) and len(result_data) > 0:
+                    text_content = result_data[0].get('text', '')
+                    if text_content:
+                        final_result = text_content
+                        self._mark("first_result")
+                        logger.info(f"  片段{acked}: {text_content[:30]}...")
+                elif isinstance(result_data, str):
+                    final_result = result_data
+
+            is_final = (isinstance(seq, int) and seq < 0) or \
+                (send_state['last_seq'] is not None and acked >= send_state['last_seq'])
+            if is_final:
+                return final_result
+
+            if streaming and final_result:
+                self._emit_partial(attempt.name, final_result)
+
+        return None
+
+    def _mark(self, stage):
+        """记录阶段耗时，只保留最早的一次"""
+        self.timings.setdefault(stage, time.monotonic() - self._started)
+
+    def _emit_partial(self, owner, text):
+        """多路识别时只显示先出结果那一路的中间结果，避免交替闪烁"""
+        self._mark("first_result")
+        if self._partial_owner is None:
+            self._partial_owner = owner
+        if self._partial_owner == owner:
+            self.partial_result.emit(text)
+
     def calculate_segment_size(self, audio_data):
         """计算分片大小"""
         try:
@@ -279,104 +568,33 @@ class ASRThread(QThread):
             return 480000  # 假设16kHz, 1通道, 16位, 15秒
 
     def slice_data(self, data: bytes, chunk_size: int):
-        """将音频数据分片"""
-        data_len = len(data)
-        offset = 0
-        while offset + chunk_size < data_len:
-            yield data[offset: offset + chunk_size], False
-            offset += chunk_size
-        yield data[offset:], True
+        """将音频数据分片（memoryview，不拷贝）"""
+        return asr_protocol.slice_data(data, chunk_size)
 
     def generate_header(self, version=0b0001, message_type=0b0001,
                         message_type_specific_flags=0b0000, serial_method=0b0001,
                         compression_type=0b0001, reserved_data=0x00, extension_header=bytes()):
         """生成协议头"""
-        header = bytearray()
-        header_size = int(len(extension_header) / 4) + 1
-        header.append((version << 4) | header_size)
-        header.append((message_type << 4) | message_type_specific_flags)
-        header.append((serial_method << 4) | compression_type)
-        header.append(reserved_data)
-        header.extend(extension_header)
-        return header
+        return asr_protocol.build_header(message_type, message_type_specific_flags,
+                                         serial_method, compression_type, reserved_data,
+                                         extension_header)
 
     def generate_full_default_header(self):
         """生成完整请求头"""
-        return self.generate_header()
+        return asr_protocol.FULL_REQUEST_HEADER
 
-    def generate_audio_default_header(self):
+    def generate_audio_default_header(self, compression_type=0b0001):
         """生成音频数据头"""
-        return self.generate_header(message_type=0b0010)
+        return asr_protocol.audio_header(False, compression_type == asr_protocol.GZIP)
 
-    def generate_last_audio_default_header(self):
+    def generate_last_audio_default_header(self, compression_type=0b0001):
         """生成最后一个音频数据头"""
-        return self.generate_header(
-            message_type=0b0010,
-            message_type_specific_flags=0b0010
-        )
+        return asr_protocol.audio_header(True, compression_type == asr_protocol.GZIP)
 
     def parse_response(self, res):
         """解析服务器响应"""
         try:
-            if len(res) < 4:
-                return {"error": "响应数据过短"}
-
-            protocol_version = res[0] >> 4
-            header_size = res[0] & 0x0f
-            message_type = res[1] >> 4
-            message_compression = res[2] & 0x0f
-            serialization_method = res[2] >> 4
-
-            if header_size * 4 > len(res):
-                return {"error": "头部大小错误"}
-
-            payload = res[header_size * 4:]
-            result = {}
-            payload_msg = None
-            payload_size = 0
-
-            if message_type == 0b1001:  # 完整响应
-                if len(payload) >= 4:
-                    payload_size = int.from_bytes(payload[:4], "big", signed=True)
-                    payload_msg = payload[4:]
-            elif message_type == 0b1011:  # 确认响应
-                if len(payload) >= 4:
-                    seq = int.from_bytes(payload[:4], "big", signed=True)
-                    result['seq'] = seq
-                if len(payload) >= 8:
-                    payload_size = int.from_bytes(payload[4:8], "big", signed=False)
-                    payload_msg = payload[8:]
-            elif message_type == 0b1111:  # 错误响应
-                if len(payload) >= 4:
-                    code = int.from_bytes(payload[:4], "big", signed=False)
-                    result['code'] = code
-                payload_msg = payload[8:] if len(payload) >= 8 else b""
-
-            if payload_msg:
-                if message_compression == 0b0001:  # GZIP解压
-                    try:
-                        payload_msg = gzip.decompress(payload_msg)
-                    except Exception as e:
-                        return {"error": f"解压失败: {e}"}
-
-                if serialization_method == 0b0001:  # JSON解析
-                    try:
-                        payload_msg = json.loads(payload_msg.decode("utf-8"))
-                    except (json.JSONDecodeError, UnicodeDecodeError) as e:
-                        # 尝试直接解码为字符串
-                        try:
-                            payload_msg = payload_msg.decode("utf-8")
-                        except UnicodeDecodeError:
-                            return {"error": f"数据解码失败: {e}"}
-                else:
-                    try:
-                        payload_msg = payload_msg.decode("utf-8")
-                    except UnicodeDecodeError:
-                        return {"error": "字符串解码失败"}
-
-                result['payload_msg'] = payload_msg
-
-            return result
+            return asr_protocol.parse_response(res)
         except Exception as e:
             logger.error(f"❌ 响应解析失败：{str(e)}")
-            return {"error": str(e)}
\ No newline at end of file
+            return {"error": str(e)}
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""常驻采集服务 - 录音页可见期间保持麦克风打开，并保留最近一段预录音"""
+
+import os
+import queue
+import shutil
+import subprocess
+import threading
+from collections import deque
+from PySide6.QtCore import QObject, Signal
+from utils.config import Config
+
+
+class CaptureService(QObject):
+    """持续运行一个 arecord 进程，把 PCM 分发给订阅者
+
+    打开 ALSA 设备往往要数百毫秒，按下按钮时再启动 arecord 会吞掉第一个字。
+    本服务在页面显示时 acquire() 打开设备、隐藏时 release() 释放；
+    期间始终保留最近 CAPTURE_PREROLL_MS 的音频，subscribe() 返回的队列
+    以这段预录音开头，之后实时收到新数据，因此录音从按下之前就已开始。
+    读取线程阻塞在管道 read 上，数据到达即分发，不做轮询。
+    """
+
+    error = Signal(str)
+
+    CHUNK_BYTES = 3200  # 16kHz/16bit/单声道下 100ms
+    START_TIMEOUT = 1.0  # 录音线程等待设备启动的最长时间（秒）
+
+    def __init__(self, device=None):
+        super().__init__()
+        config = Config.get_instance()
+        self.device = device
+        self.rate = config.SAMPLE_RATE
+        self.channels = config.CHANNELS
+        self.sampwidth = config.BIT_DEPTH // 8
+        self.preroll_bytes = self._align(
+            self.rate * self.channels * self.sampwidth * config.CAPTURE_PREROLL_MS // 1000)
+
+        self._lock = threading.Lock()
+        self._wanted = False
+        self._running = False
+        self._proc = None
+        self._ready = threading.Event()  # 已收到首批数据，或采集线程已退出
+        self._ring = deque()     # 最近的 PCM 分片
+        self._ring_size = 0
+        self._subscribers = []
+
+    @classmethod
+    def get_instance(cls):
+        """获取全局实例"""
+        if not hasattr(cls, '_instance'):
+            cls._instance = cls()
+        return cls._instance
+
+    @staticmethod
+    def available():
+        return shutil.which("arecord") is not None
+
+    @property
+    def active(self):
+        """设备已打开并在采集"""
+        return self._proc is not None and self._proc.poll() is None
+
+    def _align(self, n):
+        frame = self.channels * self.sampwidth
+        return n - n % frame
+
+    # ---------- 设备生命周期 ----------
+
+    def acquire(self):
+        """打开设备开始常驻采集（可重复调用，立即返回）"""
+        if not self.available():
+            return
+        with self._lock:
+            self._wanted = True
+            if self._running:
+                return
+            self._running = True
+            self._ready.clear()
+        threading.Thread(target=self._run, name="capture-service", daemon=True).start()
+
+    def release(self):
+        """释放设备（立即返回，读取线程收到 EOF 后自行退出）"""
+        with self._lock:
+            self._wanted = False
+            proc = self._proc
+        if proc and proc.poll() is None:
+            try:
+                proc.terminate()
+            except Exception:
+                pass
+
+    def wait_ready(self, timeout):
+        """设备正在启动时等待其出数据；返回是否可以订阅（未启动或启动失败时返回 False）"""
+        with self._lock:
+            running = self._running
+        if running:
+            self._ready.wait(timeout)
+        return self.active
+
+    def _run(self):
+        try:
+            while True:
+                with self._lock:
+                    if not self._wanted:
+                        self._running = False
+                        return
+                if not self._capture():
+                    with self._lock:
+                        self._wanted = False
+                        self._running = False
+                    return
+        finally:
+            self._ready.set()  # 唤醒 wait_ready，由调用方根据 active 判断
+
+    def _capture(self):
+        """运行一次 arecord 直到 EOF；设备异常退出时返回 False"""
+        cmd = ["arecord", "-q", "-t", "raw", "-f", "S16_LE",
+               "-r", str(self.rate), "-c", str(self.channels)]
+        if self.device:
+            cmd += ["-D", self.device]
+        cmd += ["-"]
+
+        try:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        except Exception as e:
+            self.error.emit(f"打开录音设备失败: {e}")
+            return False
+
+        with self._lock:
+            self._proc = proc
+            self._ring.clear()
+            self._ring_size = 0
+            if not self._wanted:
+                proc.terminate()  # 启动期间已被 release()
+        print("🎙️ 常驻采集已启动:", " ".join(cmd))
+
+        received = 0
+        fd = proc.stdout.fileno()
+        try:
+            while True:
+                data = os.read(fd, self.CHUNK_BYTES)
+                if not data:
+                    break
+                if not received:
+                    self._ready.set()
+                received += len(data)
+                self._dispatch(data)
+        finally:
+            proc.stdout.close()
+            proc.wait()
+            with self._lock:
+                self._proc = None
+                wanted = self._wanted
+                subscribers, self._subscribers = self._subscribers, []
+            for chunks in subscribers:
+                chunks.put(None)
+            print("🧹 常驻采集已停止")
+
+        if wanted and received == 0:
+            self.error.emit("录音设备无法打开或被占用")
+            return False
+        return True
+
+    def _dispatch(self, data):
+        with self._lock:
+            self._ring.append(data)
+            self._ring_size += len(data)
+            while self._ring and self._ring_size - len(self._ring[0]) >= self.preroll_bytes:
+                self._ring_size -= len(self._ring.popleft())
+            subscribers = list(self._subscribers)
+        for chunks in subscribers:
+            chunks.put(data)
+
+    # ---------- 订阅 ----------
+
+    def subscribe(self):
+        """返回一个队列：先是预录音，然后是实时 PCM，设备关闭时收到 None"""
+        chunks = queue.Queue()
+        with self._lock:
+            preroll = b"".join(self._ring)
+            if len(preroll) > self.preroll_bytes:
+                preroll = preroll[len(preroll) - self.preroll_bytes:]
+            if preroll:
+                chunks.put(preroll)
+            if self._proc is None:
+                chunks.put(None)
+            else:
+                self._subscribers.append(chunks)
+        return chunks
+
+    def unsubscribe(self, chunks):
+        with self._lock:
+            if chunks in self._subscribers:
+                self._subscribers.remove(chunks)
+        chunks.put(None)
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""生图调度器 - 所有生图请求共用一个线程池，按批次管理、错开启动、统一取消"""
+
+import itertools
+import logging
+from PySide6.QtCore import QObject, QThreadPool, QTimer, Signal, Slot
+from threads.image_gen_thread import ImageGenJob, TERMINAL_STATES, CANCELLED
+from utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationScheduler(QObject):
+    """全局生图调度器
+
+    每次生成为一个批次（batch），批次内每张图是一个 ImageGenJob。任务放入
+    专用的 QThreadPool（并发数 GEN_CONCURRENCY，线程常驻复用），第 i 个任务
+    延迟 i * GEN_STAGGER_MS 再入池，避免同一时刻打满接口触发限流。
+    批次内任务全部进入终态后发出 batch_finished 并释放任务对象。
+    所有信号都在 GUI 线程发出，参数以 (批次, 序号) 开头，便于页面过滤过期批次。
+    """
+
+    job_result = Signal(int, int, str)    # 批次, 序号, 图片路径（空字符串表示失败）
+    job_error = Signal(int, int, str)     # 批次, 序号, 错误信息
+    job_progress = Signal(int, int, str)  # 批次, 序号, 进度信息
+    job_preview = Signal(int, int, int, int, bytes)  # 批次, 序号, 宽, 高, RGB 字节（下载中的预览）
+    job_state = Signal(int, int, str)     # 批次, 序号, 状态（queued/running/retrying/done/failed/cancelled）
+    batch_finished = Signal(int)          # 批次全部结束
+
+    def __init__(self):
+        super().__init__()
+        self.config = Config.get_instance()
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max(1, self.config.GEN_CONCURRENCY))
+        self.pool.setExpiryTimeout(-1)  # 工作线程常驻，下次生成无需重新创建
+        self._ids = itertools.count(1)
+        self._batches = {}  # batch_id -> [ImageGenJob]
+        self._pending = {}  # batch_id -> 尚未结束的任务序号（仅在 GUI 线程按信号更新）
+        self._queued = set()  # 已放入线程池的任务
+
+    @classmethod
+    def get_instance(cls):
+        """获取全局实例"""
+        if not hasattr(cls, '_instance'):
+            cls._instance = cls()
+        return cls._instance
+
+    def submit(self, prompt, count=4, inline=None):
+        """提交一批生成任务，返回批次号；inline 见 ImageGenJob"""
+        batch_id = next(self._ids)
+        jobs = []
+        for i in range(count):
+            job = ImageGenJob(prompt, batch_id, i, inline=inline)
+            job.signals.result.connect(self._on_result)
+            job.signals.error.connect(self.job_error)
+            job.signals.progress.connect(self.job_progress)
+            job.signals.preview.connect(self.job_preview)
+            job.signals.state_changed.connect(self._on_state)
+            jobs.append(job)
+        self._batches[batch_id] = jobs
+        self._pending[batch_id] = set(range(count))
+
+        stagger = max(0, self.config.GEN_STAGGER_MS)
+        for i, job in enumerate(jobs):
+            if i == 0 or stagger == 0:
+                self._start(job)
+            else:
+                QTimer.singleShot(i * stagger, self, lambda j=job: self._start(j))
+        logger.info(f"🧵 提交生图批次 {batch_id}：{count} 张，间隔 {stagger}ms")
+        return batch_id
+
+    def _start(self, job):
+        if job.batch_id not in self._batches:
+            return  # 批次已取消并释放
+        if job._stop_requested:
+            return
+        self._queued.add(job)
+        self.pool.start(job)
+
+    def cancel(self, batch_id):
+        """取消批次：排队中的任务直接移出线程池，运行中的任务收到取消标志后自行退出，不阻塞"""
+        jobs = self._batches.get(batch_id)
+        if not jobs:
+            return
+        for job in jobs:
+            job.cancel()
+            # 尚未入池（还在错开等待）或能从池中取回的任务不会再发信号，直接记为取消
+            if job not in self._queued or self.pool.tryTake(job):
+                self._queued.discard(job)
+                job.state = CANCELLED
+                self._pending[batch_id].discard(job.index)
+        self._check_finished(batch_id)
+
+    def cancel_all(self):
+        for batch_id in list(self._batches):
+            self.cancel(batch_id)
+
+    def states(self, batch_id):
+        """批次内各任务的当前状态"""
+        return [job.state for job in self._batches.get(batch_id, [])]
+
+    @Slot(int, int, str)
+    def _on_result(self, batch_id, index, path):
+        self.job_result.emit(batch_id, index, path)
+
+    @Slot(int, int, str)
+    def _on_state(self, batch_id, index, state):
+        self.job_state.emit(batch_id, index, state)
+        if state in TERMINAL_STATES and batch_id in self._pending:
+            self._pending[batch_id].discard(index)
+            self._check_finished(batch_id)
+
+    def _check_finished(self, batch_id):
+        if self._pending.get(batch_id):
+            return
+        self._pending.pop(batch_id, None)
+        for job in self._batches.pop(batch_id, []):
+            self._queued.discard(job)
+        logger.info(f"✅ 生图批次 {batch_id} 结束")
+        self.batch_finished.emit(batch_id)
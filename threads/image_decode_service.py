@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""图片解码服务 - 缩略图与查看器的图片统一在后台解码，限制并发、合并重复请求、可取消"""
+
+import itertools
+import logging
+from collections import deque
+from PySide6.QtCore import QObject, Slot
+from PySide6.QtGui import QImage
+from threads.image_decode_thread import ImageDecodeThread
+from utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class ImageDecodeService(QObject):
+    """基于 ImageDecodeThread 的解码池
+
+    request(path, (宽, 高), callback) 返回一个票据；同一文件、同一尺寸的请求
+    在排队或解码期间合并为一次解码，结果分别回调。同时运行的解码线程不超过
+    DECODE_WORKERS 个，其余排队。cancel(票据) 取消单个请求，某次解码的
+    请求全部取消后，排队中的直接移除，运行中的通知线程尽快停止。
+
+    回调在 GUI 线程执行，参数为 QImage（失败时为 None）。QImage 直接引用线程
+    返回的 RGB 缓冲，不再复制。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.max_workers = max(1, Config.get_instance().DECODE_WORKERS)
+        self._tickets = itertools.count(1)
+        self._jobs = {}        # (path, size) -> {票据: 回调}
+        self._owner = {}       # 票据 -> (path, size)
+        self._queue = deque()  # 等待解码的 (path, size)
+        self._running = {}     # ImageDecodeThread -> (path, size)
+
+    @classmethod
+    def get_instance(cls):
+        """获取全局实例"""
+        if not hasattr(cls, '_instance'):
+            cls._instance = cls()
+        return cls._instance
+
+    def request(self, path, size, callback):
+        """请求把 path 解码并等比缩放到 size 以内，返回票据"""
+        key = (path, tuple(size))
+        ticket = next(self._tickets)
+        self._owner[ticket] = key
+        waiting = self._jobs.get(key)
+        if waiting is not None:
+            waiting[ticket] = callback  # 合并到已有的解码
+            return ticket
+        self._jobs[key] = {ticket: callback}
+        self._queue.append(key)
+        self._pump()
+        return ticket
+
+    def cancel(self, ticket):
+        """取消请求（未知或已完成的票据直接忽略）"""
+        key = self._owner.pop(ticket, None)
+        if key is None:
+            return
+        waiting = self._jobs.get(key)
+        if waiting is None:
+            return
+        waiting.pop(ticket, None)
+        if waiting:
+            return
+        # 已无人等待这次解码
+        del self._jobs[key]
+        try:
+            self._queue.remove(key)
+        except ValueError:
+            for thread, running_key in self._running.items():
+                if running_key == key:
+                    thread.stop()
+
+    def shutdown(self, timeout_ms=500):
+        """退出前丢弃排队的请求，停止并等待运行中的解码线程"""
+        self._jobs.clear()
+        self._owner.clear()
+        self._queue.clear()
+        for thread in list(self._running):
+            thread.stop()
+        for thread in list(self._running):
+            thread.wait(timeout_ms)
+
+    def _pump(self):
+        while self._queue and len(self._running) < self.max_workers:
+            key = self._queue.popleft()
+            path, size = key
+            thread = ImageDecodeThread(path, parent=self, target_size=size)
+            thread.result.connect(self._on_result)
+            thread.error.connect(self._on_error)
+            thread.finished.connect(self._on_finished)
+            self._running[thread] = key
+            thread.start()
+
+    def _deliver(self, thread, image):
+        key = self._running.get(thread)
+        waiting = self._jobs.pop(key, None) if key is not None else None
+        if not waiting:
+            return
+        for ticket, callback in waiting.items():
+            self._owner.pop(ticket, None)
+            try:
+                callback(image)
+            except Exception as e:
+                logger.error(f"图片解码回调失败: {e}")
+
+    @Slot(int, int, bytes)
+    def _on_result(self, width, height, data):
+        image = QImage(data, width, height, width * 3, QImage.Format_RGB888)
+        self._deliver(self.sender(), image)
+
+    @Slot(str)
+    def _on_error(self, message):
+        thread = self.sender()
+        logger.warning(f"图片解码失败 {getattr(thread, 'image_path', '')}: {message}")
+        self._deliver(thread, None)
+
+    @Slot()
+    def _on_finished(self):
+        thread = self.sender()
+        key = self._running.pop(thread, None)
+        # 线程被中途停止时不会发出结果；若期间又有新的同尺寸请求且没有别的线程
+        # 在解码它（request() 可能已为它另起线程），重新排队
+        if (key is not None and key in self._jobs and key not in self._queue
+                and key not in self._running.values()):
+            self._queue.append(key)
+        thread.deleteLater()
+        self._pump()
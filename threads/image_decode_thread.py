@@ -1,21 +1,33 @@
 import os
 import time
-from PySide6.QtCore import QThread, Signal
+from PySide6.QtCore import QThread, Signal, QSize
+from PySide6.QtGui import QImageReader
 from PIL import Image as PILImage, ImageFile, UnidentifiedImageError
+from utils.config import Config
+from utils.image_utils import ImageUtils
 
 # 允许加载截断的图片，避免网络/移动过程中出现的半截图导致解码失败
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 
 
 class ImageDecodeThread(QThread):
-    """后台解码并按目标高度缩放图片，返回 RGB 原始字节"""
+    """后台解码并按目标高度（或等比放入 target_size 宽高框）缩放图片，返回 RGB 原始字节
+
+    解码时即按目标尺寸缩小（见 decode_pil / decode_qt），不再完整解码后 LANCZOS 缩放。
+    DECODE_BACKEND 选择 pil（默认）或 qt。
+    """
     result = Signal(int, int, bytes)
     error = Signal(str)
 
-    def __init__(self, image_path: str, target_h: int = 250, parent=None):
+    SMALL_TARGET = 256   # 最长边不超过该值时最后一步用双线性
+    REDUCING_GAP = 2.0   # 先整数倍 reduce 到目标的 2 倍以内再滤波
+
+    def __init__(self, image_path: str, target_h: int = 250, parent=None, target_size=None):
         super().__init__(parent)
         self.image_path = image_path
         self.target_h = target_h
+        self.target_size = target_size  # (宽, 高)；设置后忽略 target_h，且不放大
+        self.backend = Config.get_instance().DECODE_BACKEND
         self._stop = False
 
     def run(self):
@@ -45,28 +57,60 @@ class ImageDecodeThread(QThread):
                 if self._stop:
                     return
 
-                # 转换并确保真正解码完成（load）
-                im = im.convert('RGB')
-                im.load()
-
                 w, h = im.size
                 if w <= 0 or h <= 0:
                     self.error.emit("图片尺寸异常")
                     return
+                new_w, new_h = self.scaled_size(w, h)
 
-                new_w = max(1, int(w * self.target_h / h))
-                if self._stop:
+                if self.backend == "qt":
+                    data = self.decode_qt(self.image_path, (new_w, new_h))
+                else:
+                    data = self.decode_pil(im, (new_w, new_h))
+                if data is None:
+                    self.error.emit("图片解码失败")
                     return
-
-                # 高质量缩放
-                im = im.resize((new_w, self.target_h), PILImage.Resampling.LANCZOS)
                 if self._stop:
                     return
-
-                data = im.tobytes("raw", "RGB")
-                self.result.emit(new_w, self.target_h, data)
+                self.result.emit(new_w, new_h, data)
         except Exception as e:
             self.error.emit(str(e))
 
+    def scaled_size(self, w, h):
+        """根据原图尺寸计算输出尺寸"""
+        if self.target_size:
+            box_w, box_h = self.target_size
+            scale = min(box_w / w, box_h / h, 1.0)
+            return max(1, round(w * scale)), max(1, round(h * scale))
+        return max(1, int(w * self.target_h / h)), self.target_h
+
+    @classmethod
+    def resample_for(cls, size):
+        """小尺寸目标在整数倍缩小之后只剩不到 2 倍的缩放，用双线性即可"""
+        if max(size) <= cls.SMALL_TARGET:
+            return PILImage.Resampling.BILINEAR
+        return PILImage.Resampling.BICUBIC
+
+    @classmethod
+    def decode_pil(cls, im, size):
+        """PIL 缩小解码：JPEG 用 draft 让 libjpeg 按 1/2、1/4、1/8 直接解码，
+        其余格式解码后先 reduce 整数倍缩小，最后一步用廉价滤波缩到目标尺寸"""
+        im.draft('RGB', size)
+        if im.mode != 'RGB':
+            im = im.convert('RGB')
+        if im.size != size:
+            im = im.resize(size, cls.resample_for(size), reducing_gap=cls.REDUCING_GAP)
+        return im.tobytes("raw", "RGB")
+
+    @staticmethod
+    def decode_qt(path, size):
+        """Qt 缩小解码：QImageReader.setScaledSize（JPEG 插件同样按 DCT 比例解码）"""
+        reader = QImageReader(path)
+        reader.setScaledSize(QSize(*size))
+        image = reader.read()
+        if image.isNull():
+            return None
+        return ImageUtils.qimage_rgb(image)[2]
+
     def stop(self):
         self._stop = True
\ No newline at end of file
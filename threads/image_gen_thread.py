@@ -1,43 +1,141 @@
 # threads/image_gen_thread.py
 # -*- coding: utf-8 -*-
-"""图片生成线程 - 支持本地保存并转换为 PNG 缩略图 - 增强安全性"""
+"""图片生成任务 - 支持本地保存并转换为 PNG 缩略图 - 增强安全性
+
+ImageGenJob 是可放入线程池的单张图片生成任务（由 GenerationScheduler 调度），
+ImageGenThread 保留原有的 QThread 接口，内部执行同一个任务。
+"""
 
 import os
-import tempfile
-import requests
+import base64
+import binascii
+import random
+import httpx
 import logging
-from PySide6.QtCore import QThread, Signal
-from volcenginesdkarkruntime import Ark
+from PySide6.QtCore import QObject, QRunnable, QThread, Signal
+from volcenginesdkarkruntime._exceptions import ArkAPIConnectionError, ArkBadRequestError
 from utils.config import Config
-from utils.image_utils import ImageUtils
+from utils.http_cancel import CancelToken, cancel_scope
+from utils.net_client import NetClient
+from utils.image_utils import ImageUtils, ProgressivePreview
+from utils.image_encoder import ImageEncoder, EncodePool
+from utils.image_pyramid import ImagePyramid
 from datetime import datetime
-import shutil
 
 logger = logging.getLogger(__name__)
 
 
-class ImageGenThread(QThread):
-    result = Signal(str)
-    error = Signal(str)
-    progress = Signal(str)
+# 任务状态
+QUEUED = "queued"
+RUNNING = "running"
+RETRYING = "retrying"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TERMINAL_STATES = (DONE, FAILED, CANCELLED)
+
+
+class ImageGenSignals(QObject):
+    """ImageGenJob 的信号（QRunnable 不是 QObject），参数均以 (批次, 序号) 开头"""
+
+    result = Signal(int, int, str)
+    error = Signal(int, int, str)
+    progress = Signal(int, int, str)
+    preview = Signal(int, int, int, int, bytes)  # 下载中的低分辨率预览：宽, 高, RGB 字节
+    state_changed = Signal(int, int, str)
+
+
+class ImageGenJob(QRunnable):
+    """单张图片生成：调用 Ark 接口、下载并转存
 
-    def __init__(self, prompt):
+    遇到 429/5xx 或连接错误时按带抖动的指数退避重试。cancel() 可在任何线程调用：
+    退避等待立即结束，进行中的接口调用和下载的 socket 被直接关闭，任务随即以
+    cancelled 状态结束，调用方无需等待线程。
+    """
+
+    RETRY_STATUS = (429, 500, 502, 503, 504)
+    MAX_SIDE = 1280  # 输出图片最长边
+    _inline_unsupported = False  # 接口拒绝过 b64_json 后，本进程内不再尝试
+
+    def __init__(self, prompt, batch_id=0, index=0, inline=None):
         super().__init__()
+        self.setAutoDelete(False)  # 由调度器持有引用，批次结束后统一释放
         self.prompt = prompt
+        self.batch_id = batch_id
+        self.index = index
         self.config = Config.get_instance()
-        self._stop_requested = False
-
-    def stop(self):
-        """停止生成"""
-        self._stop_requested = True
+        # inline：请求 b64_json 内联返回图片，省去一次 CDN 下载；失败时回退 URL 下载
+        self.inline = self.config.GEN_INLINE_IMAGE if inline is None else inline
+        self.encoder = ImageEncoder.from_config()
+        self.signals = ImageGenSignals()
+        self.state = QUEUED
+        self.token = CancelToken()
+
+    @property
+    def _stop_requested(self):
+        return self.token.cancelled
+
+    def cancel(self):
+        """取消任务（立即返回）"""
+        self.token.cancel()
+
+    def _emit_progress(self, text):
+        self.signals.progress.emit(self.batch_id, self.index, text)
+
+    def _set_state(self, state):
+        self.state = state
+        self.signals.state_changed.emit(self.batch_id, self.index, state)
+
+    # ---------- 重试 ----------
+
+    @classmethod
+    def is_transient(cls, e):
+        """是否为值得重试的临时错误：限流、服务端错误、连接失败/超时"""
+        if isinstance(e, (ArkAPIConnectionError, httpx.TransportError)):
+            return True
+        status = getattr(e, 'status_code', None)
+        if status is None and isinstance(e, httpx.HTTPStatusError):
+            status = e.response.status_code
+        return status in cls.RETRY_STATUS
+
+    @staticmethod
+    def rejects_inline(e):
+        """是否为接口拒绝 response_format 参数（400 且错误指向该参数），其余错误不应改走 URL"""
+        if not isinstance(e, ArkBadRequestError):
+            return False
+        text = f"{getattr(e, 'param', None) or ''} {getattr(e, 'message', '') or e}"
+        return "response_format" in text
+
+    def backoff_delay(self, attempt):
+        """全抖动指数退避：在 [0, min(上限, 基数 * 2^attempt)] 内随机"""
+        cap = min(self.config.GEN_BACKOFF_MAX, self.config.GEN_BACKOFF_BASE * (2 ** attempt))
+        return random.uniform(0, cap)
+
+    def with_retry(self, what, fn, *args, **kwargs):
+        """执行 fn，临时错误时退避重试；取消时返回 None"""
+        attempt = 0
+        while True:
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if self._stop_requested or not self.is_transient(e) or attempt >= self.config.MAX_RETRIES:
+                    raise
+                delay = self.backoff_delay(attempt)
+                attempt += 1
+                logger.warning(f"{what}失败（{e}），{delay:.1f}秒后第{attempt}次重试")
+                self._set_state(RETRYING)
+                self._emit_progress(f"服务繁忙，{delay:.0f}秒后重试...")
+                if self.token.wait(delay):
+                    return None
+                self._set_state(RUNNING)
 
     def download_image(self, url):
-        """下载图片，增加安全检查"""
+        """下载图片到内存，增加安全检查；返回图片数据（bytearray），失败返回 None"""
         try:
             if self._stop_requested:
                 return None
 
-            self.progress.emit("正在下载图片...")
+            self._emit_progress("正在下载图片...")
 
             # 验证URL
             if not url or not url.startswith(('http://', 'https://')):
@@ -45,182 +143,237 @@ class ImageGenThread(QThread):
                 return None
 
             # 下载文件
-            session = requests.Session()
-            session.headers.update({
-                'User-Agent': 'Mozilla/5.0 (compatible; AI-Image-Generator/1.0)'
-            })
-
-            response = session.get(
-                url,
-                timeout=self.config.REQUEST_TIMEOUT,
-                stream=True,
-                allow_redirects=True
-            )
-            response.raise_for_status()
-
-            # 检查内容类型
-            content_type = response.headers.get('content-type', '').lower()
-            if not any(img_type in content_type for img_type in ['image/', 'application/octet-stream']):
-                logger.error(f"无效的内容类型: {content_type}")
-                return None
+            headers = {'User-Agent': 'Mozilla/5.0 (compatible; AI-Image-Generator/1.0)'}
+            with NetClient.get_instance().http.stream("GET", url, headers=headers) as response:
+                response.raise_for_status()
+
+                # 检查内容类型
+                content_type = response.headers.get('content-type', '').lower()
+                if not any(img_type in content_type for img_type in ['image/', 'application/octet-stream']):
+                    logger.error(f"无效的内容类型: {content_type}")
+                    return None
 
-            # 检查文件大小
-            content_length = response.headers.get('content-length')
-            if content_length:
-                size = int(content_length)
-                if size > self.config.MAX_FILE_SIZE:
-                    logger.error(f"文件过大: {size} bytes")
+                # 检查文件大小
+                total_size = int(response.headers.get('content-length', 0))
+                if total_size > self.config.MAX_FILE_SIZE:
+                    logger.error(f"文件过大: {total_size} bytes")
                     return None
 
-            # 创建临时文件
-            temp_file = tempfile.NamedTemporaryFile(
-                suffix='.jpg',
-                delete=False,
-                prefix='generated_image_'
-            )
-
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
-
-            with open(temp_file.name, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if self._stop_requested:
-                        try:
-                            os.unlink(temp_file.name)
-                        except:
-                            pass
+                preview = ProgressivePreview(
+                    interval=self.config.GEN_PREVIEW_INTERVAL_MS / 1000) if self.config.GEN_PREVIEW else None
+
+                # 已知长度时一次分配好缓冲，数据原地写入；未知长度时追加
+                data = bytearray(total_size)
+                view = memoryview(data)
+                downloaded = 0
+                for chunk in response.iter_bytes(chunk_size=64 * 1024):
+                    end = downloaded + len(chunk)
+                    # 检查大小限制
+                    if end > self.config.MAX_FILE_SIZE:
+                        logger.error("下载文件超过大小限制")
                         return None
-
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-
-                        # 检查大小限制
-                        if downloaded > self.config.MAX_FILE_SIZE:
-                            logger.error("下载文件超过大小限制")
-                            try:
-                                os.unlink(temp_file.name)
-                            except:
-                                pass
-                            return None
-
-                        if total_size > 0:
-                            progress = int((downloaded / total_size) * 100)
-                            self.progress.emit(f"下载中... {progress}%")
-
-            # 验证下载的文件
-            if not os.path.exists(temp_file.name) or os.path.getsize(temp_file.name) == 0:
+                    if end <= len(data):
+                        view[downloaded:end] = chunk
+                    else:
+                        view.release()
+                        data[downloaded:] = chunk
+                        view = memoryview(data)
+                    downloaded = end
+
+                    frame = preview.update(data, downloaded) if preview else None
+                    if frame:
+                        self.signals.preview.emit(self.batch_id, self.index, *frame)
+
+                    if total_size > 0:
+                        progress = int((downloaded / total_size) * 100)
+                        self._emit_progress(f"下载中... {progress}%")
+                view.release()
+
+                # 连接提前断开、正文短于 content-length：当作临时网络错误重试，不拿半截数据解码
+                if 0 < downloaded < total_size and not response.headers.get('content-encoding'):
+                    raise httpx.RemoteProtocolError(
+                        f"图片正文不完整: {downloaded}/{total_size} bytes", request=response.request)
+
+            # 验证下载的数据
+            if downloaded == 0:
                 logger.error("下载的文件为空")
                 return None
+            del data[downloaded:]
 
-            logger.info(f"✅ 图片已下载到: {temp_file.name} ({downloaded} bytes)")
-            return temp_file.name
+            logger.info(f"✅ 图片已下载到内存 ({downloaded} bytes)")
+            return data
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"❌ 网络请求失败: {e}")
-            return None
         except Exception as e:
-            logger.error(f"❌ 下载失败: {e}")
+            if self._stop_requested:
+                return None
+            if isinstance(e, httpx.HTTPError):
+                if self.is_transient(e):
+                    raise  # 交给 with_retry 退避重试
+                logger.error(f"❌ 网络请求失败: {e}")
+            else:
+                logger.error(f"❌ 下载失败: {e}")
             return None
 
+    def _finish(self, path, error=None):
+        """结束任务：失败时先发 error 再发空 result，与原线程接口一致"""
+        if self._stop_requested:
+            self._set_state(CANCELLED)
+            return
+        if error:
+            self.signals.error.emit(self.batch_id, self.index, error)
+        self.signals.result.emit(self.batch_id, self.index, path)
+        self._set_state(DONE if path else FAILED)  # 终态最后发出，保证结果先于批次结束到达
+
     def run(self):
+        if self._stop_requested:
+            self._set_state(CANCELLED)
+            return
+        self._set_state(RUNNING)
+        with cancel_scope(self.token):
+            self._generate()
+
+    def _final_base(self):
+        """最终文件路径（不含扩展名，由编码格式决定）"""
+        os.makedirs(self.config.SAVE_DIR, exist_ok=True)
+        ts_name = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        return os.path.join(self.config.SAVE_DIR, ts_name)
+
+    def _request_image(self, client, prompt, inline):
+        """调用生图接口，返回第一张图片的数据项（含 b64_json 或 url）"""
+        kwargs = dict(model=self.config.MODEL_NAME, prompt=prompt, watermark=False)
+        if inline:
+            kwargs['response_format'] = "b64_json"
+        response = self.with_retry("生成图片", client.images.generate, **kwargs)
+        if response and response.data and len(response.data) > 0:
+            return response.data[0]
+        return None
+
+    def _decode(self, data):
+        """在内存中解码并缩放到输出尺寸，失败返回 None"""
         try:
-            if self._stop_requested:
-                return
+            return self.encoder.load(data, self.MAX_SIDE)
+        except Exception as e:
+            logger.error(f"❌ 图片解码失败: {e}")
+            return None
+
+    def _decode_inline(self, b64):
+        """内联图片：在内存中解码，不下载、不落临时文件"""
+        try:
+            data = base64.b64decode(b64, validate=True)
+        except (binascii.Error, ValueError) as e:
+            logger.warning(f"内联图片解码失败: {e}")
+            return None
+        logger.info(f"📦 收到内联图片 ({len(data)} bytes)")
+        return self._decode(data)
+
+    def _decode_from_url(self, image_url):
+        """下载 URL 图片到内存并解码"""
+        data = self.with_retry("下载图片", self.download_image, image_url)
+        if not data or self._stop_requested:
+            return None
+        return self._decode(data)
+
+    def _persist(self, im, source, prompt):
+        """在编码线程池中执行：一次写出原图、查看器图、缩略图和清单，完成后才发出 result"""
+        try:
+            path = ImagePyramid.build(im, self._final_base(), self.encoder)
+            logger.info(f"✅ 图片已保存: {path}")
+        except Exception as e:
+            logger.error(f"❌ 图片保存失败: {e}")
+            self._finish("", f"图片保存失败：{e}")
+            return
+
+        # 保存信息文件用于调试
+        try:
+            with open("/tmp/last_image_info.txt", "w", encoding='utf-8') as f:
+                f.write(f"Source: {source}\n")
+                f.write(f"Local: {path}\n")
+                f.write(f"Prompt: {prompt}\n")
+        except Exception as e:
+            logger.warning(f"保存调试信息失败: {e}")
 
+        if self._stop_requested:
+            ImagePyramid.remove(path)
+        self._finish(path)
+
+    def _generate(self):
+        try:
             # 验证输入
             if not self.prompt or not self.prompt.strip():
-                self.error.emit("提示词不能为空")
+                self._finish("", "提示词不能为空")
                 return
 
             # 过滤提示词中的敏感内容（简单示例）
             filtered_prompt = self.filter_prompt(self.prompt.strip())
             if not filtered_prompt:
-                self.error.emit("提示词包含不当内容")
+                self._finish("", "提示词包含不当内容")
                 return
 
-            self.progress.emit("正在生成图片...")
+            self._emit_progress("正在生成图片...")
             logger.info(f"开始生成图片，提示词: {filtered_prompt}")
 
             try:
-                client = Ark(
-                    base_url=self.config.BASE_URL,
-                    api_key=self.config.API_KEY,
-                    timeout=self.config.REQUEST_TIMEOUT
-                )
+                client = NetClient.get_instance().ark  # 共享连接池，复用已建立的长连接
 
                 if self._stop_requested:
+                    self._finish("")
                     return
 
-                response = client.images.generate(
-                    model=self.config.MODEL_NAME,
-                    prompt=filtered_prompt,
-                    watermark=False
-                )
+                inline = self.inline and not ImageGenJob._inline_unsupported
+                try:
+                    item = self._request_image(client, filtered_prompt, inline)
+                except Exception as e:
+                    if not inline or self._stop_requested or not self.rejects_inline(e):
+                        raise
+                    # 接口不接受 b64_json：本进程内改用 URL 方式
+                    logger.warning(f"内联返回不可用，改用 URL 下载: {e}")
+                    ImageGenJob._inline_unsupported = True
+                    inline = False
+                    item = self._request_image(client, filtered_prompt, inline)
 
                 if self._stop_requested:
+                    self._finish("")
                     return
 
-                if response and response.data and len(response.data) > 0:
-                    image_url = response.data[0].url
-                    logger.info(f"🔗 获取到图片URL: {image_url}")
-
-                    local_jpg = self.download_image(image_url)
-                    if local_jpg and not self._stop_requested:
-                        # 转换为安全的PNG格式
-                        safe_path = ImageUtils.to_png_thumbnail(local_jpg, max_side=1280)
-
-                        # 保存信息文件用于调试
-                        try:
-                            os.makedirs(self.config.SAVE_DIR, exist_ok=True)
-                            ts_name = datetime.now().strftime("%Y%m%d_%H%M%S_%f") + ".png"
-                            final_path = os.path.join(self.config.SAVE_DIR, ts_name)
-                            shutil.move(safe_path, final_path)
-                            safe_path = final_path
-                            logger.info(f"✅ 图片已移动并重命名: {safe_path}")
-                        except Exception as e:
-                            logger.warning(f"重命名/移动图片失败: {e}")
-
-
-                        # 保存信息文件用于调试
-                        try:
-                            with open("/tmp/last_image_info.txt", "w", encoding='utf-8') as f:
-                                f.write(f"URL: {image_url}\n")
-                                f.write(f"Local(JPG): {local_jpg}\n")
-                                f.write(f"Local(PNG): {safe_path}\n")
-                                f.write(f"Prompt: {filtered_prompt}\n")
-                        except Exception as e:
-                            logger.warning(f"保存调试信息失败: {e}")
-
-                        # 清理原始JPG文件
-                        try:
-                            if local_jpg != safe_path and os.path.exists(local_jpg):
-                                os.remove(local_jpg)
-                        except Exception as e:
-                            logger.warning(f"清理JPG文件失败: {e}")
-
-                        if not self._stop_requested:
-                            self.result.emit(safe_path)
-                    else:
-                        if not self._stop_requested:
-                            self.error.emit("图片下载失败")
-                            self.result.emit("")
-                else:
-                    if not self._stop_requested:
-                        self.error.emit("生成失败：未返回图片")
-                        self.result.emit("")
+                if item is None:
+                    self._finish("", "生成失败：未返回图片")
+                    return
+
+                image = None
+                image_url = getattr(item, 'url', None)
+                b64 = getattr(item, 'b64_json', None) if inline else None
+                if b64:
+                    image = self._decode_inline(b64)
+                    source = "inline(b64_json)"
+                if image is None and not self._stop_requested:
+                    if inline and not image_url:
+                        # 内联数据无效且没有 URL，重新按 URL 方式请求一次
+                        logger.warning("内联图片不可用，回退为 URL 下载")
+                        item = self._request_image(client, filtered_prompt, False)
+                        image_url = getattr(item, 'url', None) if item else None
+                    if image_url:
+                        logger.info(f"🔗 获取到图片URL: {image_url}")
+                        image = self._decode_from_url(image_url)
+                        source = image_url
+
+                if image is None or self._stop_requested:
+                    self._finish("", "图片下载失败")
+                    return
+
+                # 先把解码好的图片交给界面显示，编码写盘放到编码线程池，不占用生成线程
+                self.signals.preview.emit(self.batch_id, self.index,
+                                          *ImageUtils.rgb_frame(image, ProgressivePreview.SIZE))
+                EncodePool.get_instance().submit(self._persist, image, source, filtered_prompt)
 
             except Exception as e:
                 if not self._stop_requested:
                     logger.error(f"API调用失败: {e}")
-                    self.error.emit(f"API调用失败：{str(e)}")
-                    self.result.emit("")
+                self._finish("", f"API调用失败：{str(e)}")
 
         except Exception as e:
             if not self._stop_requested:
                 logger.error(f"生成错误: {e}")
-                self.error.emit(f"生成错误：{str(e)}")
-                self.result.emit("")
+            self._finish("", f"生成错误：{str(e)}")
 
     def filter_prompt(self, prompt):
         """简单的提示词过滤"""
@@ -238,4 +391,33 @@ class ImageGenThread(QThread):
             prompt = prompt[:self.config.MAX_PROMPT_LENGTH]
             logger.info(f"提示词已截断至{self.config.MAX_PROMPT_LENGTH}字符")
 
-        return prompt
\ No newline at end of file
+        return prompt
+
+
+class ImageGenThread(QThread):
+    """单独使用时的线程封装：在自身线程中执行一个 ImageGenJob"""
+
+    result = Signal(str)    # 返回本地图片路径（空字符串表示失败）
+    error = Signal(str)     # 错误信息
+    progress = Signal(str)  # 进度信息
+    preview = Signal(int, int, bytes)  # 下载中的低分辨率预览：宽, 高, RGB 字节
+
+    def __init__(self, prompt, inline=None):
+        super().__init__()
+        self.prompt = prompt
+        self.job = ImageGenJob(prompt, inline=inline)
+        self.job.signals.result.connect(lambda _b, _i, path: self.result.emit(path))
+        self.job.signals.error.connect(lambda _b, _i, msg: self.error.emit(msg))
+        self.job.signals.progress.connect(lambda _b, _i, text: self.progress.emit(text))
+        self.job.signals.preview.connect(lambda _b, _i, w, h, data: self.preview.emit(w, h, data))
+
+    @property
+    def _stop_requested(self):
+        return self.job._stop_requested
+
+    def stop(self):
+        """请求停止"""
+        self.job.cancel()
+
+    def run(self):
+        self.job.run()
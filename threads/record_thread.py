@@ -3,11 +3,15 @@
 """录音线程 - 优先使用 arecord，稳定避坑；每次覆盖输出"""
 
 import os
-import time
 import signal
 import shutil
 import subprocess
+import threading
 from PySide6.QtCore import QThread, Signal
+from utils.config import Config
+from utils.audio_buffer import AudioBuffer
+from utils.resampler import StreamingResampler
+from utils.vad import EnergyVAD
 
 # 回退用：仅在没有 arecord 时再用 PyAudio
 try:
@@ -17,24 +21,48 @@ except Exception:
 
 
 class RecordThread(QThread):
-    """每次覆盖写 /tmp/ai_voice_image_record.wav；优先 arecord"""
+    """传入 buffer 时录入内存，否则每次覆盖写 /tmp/ai_voice_image_record.wav；优先 arecord"""
 
     finished = Signal(str)  # 返回音频文件路径
+    captured = Signal(object)  # 内存模式：录音结束，返回 AudioBuffer
+    auto_stopped = Signal()    # VAD 检测到说话结束，已自动停止录音
     error = Signal(str)     # 错误信息
 
-    def __init__(self, out_path="/tmp/ai_voice_image_record.wav", device=None):
+    CHUNK_BYTES = 3200  # 流式读取粒度：16kHz/16bit/单声道下 100ms
+
+    def __init__(self, out_path="/tmp/ai_voice_image_record.wav", device=None, buffer=None, capture=None):
         super().__init__()
         self.out_path = out_path
         self.device = device  # arecord 的 -D 设备名，可选
+        self.buffer = buffer  # AudioBuffer；设置后 arecord 输出原始 PCM 到 stdout，边录边写入内存
+        self.capture = capture  # CaptureService；内存模式下设备已常驻打开时直接订阅，含预录音
         self.recording = True
         self._proc = None  # arecord 子进程句柄
+        self._chunks = None  # 订阅 CaptureService 得到的队列
+        self._stop_event = threading.Event()
 
         # 录音参数（ASR 要求）
         self.rate = 16000
         self.channels = 1
         self.sample_fmt = "S16_LE"  # 16-bit
 
+        # 本地 VAD（仅内存模式）：丢弃首尾静音，说完后自动停止
+        self.vad = None
+        self.auto_stop = False
+        config = Config.get_instance()
+        if buffer is not None and config.VAD_ENABLED:
+            if EnergyVAD.available():
+                self.vad = EnergyVAD.from_config(config, rate=self.rate)
+                self.auto_stop = config.VAD_AUTO_STOP
+                buffer.gate()  # 检测到语音前不向识别端提供数据
+            else:
+                print("⚠️ 未安装 numpy，跳过本地 VAD")
+
     def run(self):
+        if self.buffer is not None:
+            self._run_in_memory()
+            return
+
         try:
             os.makedirs(os.path.dirname(self.out_path), exist_ok=True)
             # 先删旧文件，确保是干净输出
@@ -67,23 +95,91 @@ class RecordThread(QThread):
         finally:
             print("🧹 录音资源已清理")
 
+    def _run_in_memory(self):
+        """内存模式：PCM 直接写入 AudioBuffer，不落盘"""
+        ok = False
+        try:
+            # 页面刚显示时常驻采集可能仍在启动，稍等而不是再开一个 arecord 抢设备
+            if self.capture is not None and self.capture.wait_ready(self.capture.START_TIMEOUT):
+                ok = self._record_from_capture()
+            elif self._has_arecord():
+                ok = self._record_with_arecord(to_buffer=True)
+            else:
+                ok = self._record_with_pyaudio()
+        except Exception as e:
+            self.error.emit(f"录音失败: {e}")
+        finally:
+            # 去掉尾部静音（未检测到语音时保留整段，交给服务端判断）
+            if self.vad is not None:
+                end = self.vad.speech_end_byte()
+                if end is not None:
+                    self.buffer.trim(end=end)
+            # 无论成败都要关闭缓冲，避免识别线程一直等待
+            self.buffer.close()
+            print("🧹 录音资源已清理")
+
+        if ok:
+            self.captured.emit(self.buffer)
+        else:
+            self.finished.emit("")
+
+    def _write_pcm(self, data, allow_stop=True):
+        """写入缓冲并执行 VAD；返回 False 表示应结束录音"""
+        if not self.buffer.write(data):
+            print("⏹️ 已达最大录音时长，自动停止")
+            return False
+        if self.vad is None:
+            return True
+
+        should_stop = self.vad.update(data)
+        start = self.vad.speech_start_byte()
+        if start is not None:
+            self.buffer.open_gate(start)  # 仅首次生效
+        if should_stop and allow_stop and self.auto_stop:
+            print("🤫 检测到说话结束，自动停止录音")
+            self.auto_stopped.emit()
+            return False
+        return True
+
     def stop(self):
         """请求停止录音"""
         self.recording = False
+        self._stop_event.set()
         # arecord 的停止在 _record_with_arecord 内通过 SIGINT/terminate 实现
+        if self._chunks is not None:
+            self._chunks.put(None)  # 唤醒 _record_from_capture，队列中已有的数据照常写入
+
+    # ---------- 常驻采集路径 ----------
+
+    def _record_from_capture(self):
+        """从常驻采集服务取数据：队列以预录音开头，按下前的音节也不会丢"""
+        self._chunks = self.capture.subscribe()
+        if not self.recording:
+            self._chunks.put(None)
+        print("🎙️ 使用常驻采集录音（含预录音）")
+        try:
+            while True:
+                data = self._chunks.get()
+                if data is None:
+                    break
+                if not self._write_pcm(data, allow_stop=self.recording):
+                    break
+        finally:
+            self.capture.unsubscribe(self._chunks)
+        return True
 
     # ---------- arecord 路径 ----------
 
     def _has_arecord(self):
         return shutil.which("arecord") is not None
 
-    def _record_with_arecord(self):
-        """使用 arecord，更稳"""
+    def _record_with_arecord(self, to_buffer=False):
+        """使用 arecord，更稳；to_buffer 时从 stdout 读取原始 PCM"""
         try:
             cmd = [
                 "arecord",
                 "-q",                    # 静默
-                "-t", "wav",             # 输出 wav
+                "-t", "raw" if to_buffer else "wav",
                 "-f", self.sample_fmt,   # S16_LE
                 "-r", str(self.rate),    # 16000 Hz
                 "-c", str(self.channels) # 单声道
@@ -92,30 +188,39 @@ class RecordThread(QThread):
             if self.device:
                 cmd += ["-D", self.device]
 
-            # 输出文件路径作为最后一个参数
-            cmd += [self.out_path]
+            # 输出文件路径作为最后一个参数（内存模式为 stdout）
+            cmd += ["-"] if to_buffer else [self.out_path]
 
             print("🎙️ 使用 arecord 录音:", " ".join(cmd))
             # 注意：arecord 会直接写入文件，不需要我们再写
             self._proc = subprocess.Popen(
                 cmd,
-                stdout=subprocess.DEVNULL,
+                stdout=subprocess.PIPE if to_buffer else subprocess.DEVNULL,
                 stderr=subprocess.DEVNULL
             )
 
-            # 直到 stop() 被调用
-            while self.recording and self._proc.poll() is None:
-                time.sleep(0.05)
+            if to_buffer:
+                # 阻塞读取 stdout，数据到达即写入缓冲
+                fd = self._proc.stdout.fileno()
+                while self.recording:
+                    data = os.read(fd, self.CHUNK_BYTES)
+                    if not data:
+                        break
+                    if not self._write_pcm(data):
+                        break
+            else:
+                # 直到 stop() 被调用或 arecord 自行退出（由等待线程唤醒，不轮询）
+                proc = self._proc
+                threading.Thread(target=lambda: (proc.wait(), self._stop_event.set()),
+                                 daemon=True).start()
+                self._stop_event.wait()
 
             # 请求退出
             if self._proc and self._proc.poll() is None:
                 try:
                     # 优先发 SIGINT 让 arecord 写好 WAV 头
                     self._proc.send_signal(signal.SIGINT)
-                    for _ in range(40):  # 最多等 2 秒
-                        if self._proc.poll() is not None:
-                            break
-                        time.sleep(0.05)
+                    self._proc.wait(timeout=2)
                 except Exception:
                     pass
 
@@ -123,10 +228,7 @@ class RecordThread(QThread):
             if self._proc and self._proc.poll() is None:
                 try:
                     self._proc.terminate()
-                    for _ in range(20):
-                        if self._proc.poll() is not None:
-                            break
-                        time.sleep(0.05)
+                    self._proc.wait(timeout=1)
                 except Exception:
                     pass
             if self._proc and self._proc.poll() is None:
@@ -135,6 +237,15 @@ class RecordThread(QThread):
                 except Exception:
                     pass
 
+            if to_buffer:
+                # 读完 SIGINT 之后管道中剩余的数据
+                try:
+                    rest = self._proc.stdout.read()
+                    self._write_pcm(rest, allow_stop=False)
+                    self._proc.stdout.close()
+                except Exception:
+                    pass
+
             return True
 
         except FileNotFoundError:
@@ -154,34 +265,68 @@ class RecordThread(QThread):
 
         audio = None
         stream = None
-        frames = []
         CHUNK = 2048
         FORMAT = pyaudio.paInt16
+        target = None  # 录音写入的缓冲
+        resampler = None  # 设备只支持其他采样率时，逐块转换为 16kHz
+
+        def on_audio(in_data, frame_count, time_info, status):
+            """PortAudio 回调：直接写入预分配缓冲，写满或停止时结束流"""
+            if resampler is not None:
+                in_data = resampler.process(in_data)
+            if self.buffer is not None:
+                ok = self._write_pcm(in_data)
+            else:
+                ok = target.write(in_data)
+                if not ok:
+                    print("⏹️ 已达最大录音时长，自动停止")
+            if ok and self.recording:
+                return None, pyaudio.paContinue
+            self._stop_event.set()
+            return None, pyaudio.paComplete
+
+        def open_stream(rate):
+            return audio.open(format=FORMAT,
+                              channels=self.channels,
+                              rate=rate,
+                              input=True,
+                              frames_per_buffer=CHUNK,
+                              stream_callback=on_audio,
+                              start=False)
 
         try:
             audio = pyaudio.PyAudio()
             # 首选 16kHz，不行则回退到设备默认
             try:
-                stream = audio.open(format=FORMAT,
-                                    channels=self.channels,
-                                    rate=self.rate,
-                                    input=True,
-                                    frames_per_buffer=CHUNK)
+                stream = open_stream(self.rate)
                 actual_rate = self.rate
             except Exception:
                 default_rate = int(audio.get_default_input_device_info().get('defaultSampleRate', self.rate))
-                stream = audio.open(format=FORMAT,
-                                    channels=self.channels,
-                                    rate=default_rate,
-                                    input=True,
-                                    frames_per_buffer=CHUNK)
+                stream = open_stream(default_rate)
                 actual_rate = default_rate
                 print(f"⚠️ 采样率回退到设备默认: {default_rate}Hz")
 
+            if actual_rate != self.rate:
+                if StreamingResampler.available():
+                    resampler = StreamingResampler(actual_rate, self.rate, self.channels)
+                    print(f"🔁 采集时重采样: {actual_rate}Hz → {self.rate}Hz")
+                    actual_rate = self.rate
+                else:
+                    print("⚠️ 未安装 numpy，无法重采样")
+
+            if self.buffer is not None:
+                self.buffer.rate = actual_rate
+                if self.vad is not None and actual_rate != self.vad.rate:
+                    self.vad = EnergyVAD.from_config(Config.get_instance(), rate=actual_rate)
+            else:
+                # 按最大录音时长一次性分配，超过即停止，不再逐块追加到列表
+                target = AudioBuffer(rate=actual_rate, channels=self.channels,
+                                     sampwidth=audio.get_sample_size(FORMAT),
+                                     max_seconds=Config.get_instance().MAX_RECORD_TIME)
+
             print("🔴 录音中（PyAudio 回退）...")
-            while self.recording:
-                data = stream.read(CHUNK, exception_on_overflow=False)
-                frames.append(data)
+            stream.start_stream()
+            self._stop_event.wait()  # stop()、写满或 VAD 自动停止时唤醒
 
             # 停止流
             if stream and stream.is_active():
@@ -189,14 +334,25 @@ class RecordThread(QThread):
             if stream:
                 stream.close()
 
-            # 保存到固定路径（覆盖）
+            if resampler is not None:
+                # 写出滤波器中剩余的尾部样本
+                tail = resampler.flush()
+                if self.buffer is not None:
+                    self._write_pcm(tail, allow_stop=False)
+                else:
+                    target.write(tail)
+
+            if self.buffer is not None:
+                return True
+
+            # 保存到固定路径（覆盖），直接写出缓冲的 memoryview
             import wave
             os.makedirs(os.path.dirname(self.out_path), exist_ok=True)
             with wave.open(self.out_path, 'wb') as wf:
                 wf.setnchannels(self.channels)
-                wf.setsampwidth(audio.get_sample_size(FORMAT))
+                wf.setsampwidth(target.sampwidth)
                 wf.setframerate(actual_rate)
-                wf.writeframes(b''.join(frames))
+                wf.writeframes(target.view())
 
             print(f"💾 录音已保存: {self.out_path}")
             return True
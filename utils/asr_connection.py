@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""语音识别 WebSocket 连接管理 - 后台预热连接，识别时直接取用"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+
+import websockets
+
+from utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class ASRConnectionManager:
+    """在独立事件循环线程中维护一条预热好的 ASR 连接
+
+    服务端每条连接只处理一次识别请求，因此连接被取走后立即在后台补一条
+    新的备用连接；备用连接靠 websockets 自带的 ping 保活，超过
+    ASR_SPARE_MAX_AGE 秒后主动替换，避免被服务端判定空闲而断开。
+    最近一次 prewarm() 之后 ASR_PREWARM_WINDOW 秒内保持预热，之后不再补充。
+    """
+
+    CONNECT_TIMEOUT = 10  # 单次建连（含握手）的超时，秒
+
+    def __init__(self):
+        self.config = Config.get_instance()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever,
+                                        name="asr-connection", daemon=True)
+        self._thread.start()
+        self._spare = None          # (ws, 建立时间)
+        self._spare_task = None     # 正在建立备用连接的任务
+        self._spare_started = 0.0   # 备用连接任务的开始时间
+        self._refresh_handle = None
+        self._warm_until = 0.0
+        self._first_response_times = deque(maxlen=50)  # 主路首个响应耗时（秒），用于计算对冲延迟
+
+    @classmethod
+    def get_instance(cls):
+        """获取全局实例"""
+        if not hasattr(cls, '_instance'):
+            cls._instance = cls()
+        return cls._instance
+
+    @property
+    def loop(self):
+        return self._loop
+
+    def run(self, coro):
+        """在连接线程的事件循环中执行协程并阻塞等待结果（供 QThread 调用）"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def prewarm(self):
+        """请求在后台建立备用连接（线程安全，可重复调用）"""
+        if not self.config.ASR_PREWARM:
+            return
+        self._warm_until = time.monotonic() + self.config.ASR_PREWARM_WINDOW
+        self._loop.call_soon_threadsafe(self._ensure_spare)
+
+    def reset(self):
+        """丢弃备用连接（例如切换服务地址后），下次 prewarm()/acquire() 时重建"""
+        asyncio.run_coroutine_threadsafe(self._close_spare(), self._loop).result(timeout=5)
+
+    def shutdown(self):
+        """关闭备用连接并停止事件循环"""
+        if not self._loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_spare(), self._loop).result(timeout=2)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=2)
+
+    def record_first_response(self, seconds):
+        """记录一次主路从发起到收到首个响应的耗时"""
+        self._first_response_times.append(seconds)
+
+    def hedge_delay(self):
+        """对冲等待时长：样本足够时取首个响应耗时的 p95，否则用配置的初始值"""
+        samples = sorted(self._first_response_times)
+        if len(samples) >= 10:
+            delay = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        else:
+            delay = self.config.ASR_HEDGE_DELAY
+        return min(max(delay, self.config.ASR_HEDGE_MIN_DELAY), self.config.WS_TIMEOUT)
+
+    async def connect(self, url=None):
+        """新建并完成鉴权握手的连接，失败时按 MAX_RETRIES 重试"""
+        header = {'Authorization': f'Bearer; {self.config.ASR_TOKEN}'}
+        max_retries = self.config.MAX_RETRIES
+
+        for attempt in range(max_retries):
+            try:
+                return await asyncio.wait_for(
+                    websockets.connect(
+                        url or self.config.ASR_WS_URL,
+                        additional_headers=header,
+                        ping_interval=10,
+                        ping_timeout=5,
+                        close_timeout=10
+                    ),
+                    timeout=self.CONNECT_TIMEOUT
+                )
+            except Exception as e:
+                logger.warning(f"WebSocket连接失败 (尝试 {attempt+1}/{max_retries}): {e}")
+                if attempt == max_retries - 1:
+                    raise e
+                await asyncio.sleep(1)
+
+        raise Exception("无法建立WebSocket连接")
+
+    async def acquire(self):
+        """取走一条可用连接：优先用预热好的备用连接，并在后台补充新的备用"""
+        ws = None
+        if self._spare_task and not self._spare_task.done():
+            # 预热仍在进行：最多等到它的首次尝试超时，首次尝试已失败（进入重试）则直接新建连接；
+            # 预热任务不受影响，成功后留作下一次的备用
+            remaining = self.CONNECT_TIMEOUT - (time.monotonic() - self._spare_started)
+            if remaining > 0:
+                try:
+                    await asyncio.wait_for(asyncio.shield(self._spare_task), remaining)
+                except Exception:
+                    pass
+
+        if self._spare:
+            spare, created = self._spare
+            self._spare = None
+            if spare.close_code is None and time.monotonic() - created < self.config.ASR_SPARE_MAX_AGE:
+                ws = spare
+                logger.info("♻️ 使用预热的识别连接")
+            else:
+                await self._close_quietly(spare)
+
+        if ws is None:
+            ws = await self.connect()
+
+        # 单连接单请求：立即补一条备用，留给用户重录
+        if self.config.ASR_PREWARM:
+            self._warm_until = max(self._warm_until, time.monotonic() + self.config.ASR_PREWARM_WINDOW)
+        self._ensure_spare()
+        return ws
+
+    def _ensure_spare(self):
+        """若没有备用连接且未在建立，则启动建立任务（仅在事件循环线程中调用）"""
+        if not self.config.ASR_PREWARM or time.monotonic() > self._warm_until:
+            return
+        if self._spare and self._spare[0].close_code is None:
+            return
+        if self._spare_task and not self._spare_task.done():
+            return
+        self._spare_started = time.monotonic()
+        self._spare_task = self._loop.create_task(self._open_spare())
+
+    async def _open_spare(self):
+        try:
+            ws = await self.connect()
+        except Exception as e:
+            logger.warning(f"预热识别连接失败: {e}")
+            return
+
+        old, self._spare = self._spare, (ws, time.monotonic())
+        if old:
+            await self._close_quietly(old[0])
+        logger.info("🔥 识别连接已预热")
+
+        # 到期后替换，避免使用被服务端回收的空闲连接
+        if self._refresh_handle:
+            self._refresh_handle.cancel()
+        self._refresh_handle = self._loop.call_later(
+            self.config.ASR_SPARE_MAX_AGE, self._refresh_spare)
+
+    def _refresh_spare(self):
+        self._refresh_handle = None
+        if self._spare:
+            spare, _ = self._spare
+            self._spare = None
+            self._loop.create_task(self._close_quietly(spare))
+            self._ensure_spare()
+
+    async def _close_spare(self):
+        if self._refresh_handle:
+            self._refresh_handle.cancel()
+            self._refresh_handle = None
+        if self._spare_task and not self._spare_task.done():
+            self._spare_task.cancel()
+        if self._spare:
+            spare, _ = self._spare
+            self._spare = None
+            await self._close_quietly(spare)
+
+    @staticmethod
+    async def _close_quietly(ws):
+        try:
+            await ws.close()
+        except Exception:
+            pass
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""火山引擎流式语音识别二进制帧协议编解码
+
+帧结构：4 字节头 + [4 字节序号] + 4 字节负载长度 + 负载。
+常用头部预先计算为常量；gzip 压缩级别可配置（默认 1 级）；
+解析时全程基于 memoryview，负载直接交给解压/JSON，不做中间切片拷贝。
+"""
+
+import json
+import zlib
+
+PROTOCOL_VERSION = 0b0001
+
+# 消息类型
+FULL_CLIENT_REQUEST = 0b0001
+AUDIO_ONLY_REQUEST = 0b0010
+FULL_SERVER_RESPONSE = 0b1001
+SERVER_ACK = 0b1011
+SERVER_ERROR_RESPONSE = 0b1111
+
+# 消息类型特定标志
+NO_SEQUENCE = 0b0000
+NEG_SEQUENCE = 0b0010  # 最后一包
+
+# 序列化方式
+NO_SERIALIZATION = 0b0000
+JSON = 0b0001
+
+# 压缩方式
+NO_COMPRESSION = 0b0000
+GZIP = 0b0001
+
+GZIP_WBITS = 16 + zlib.MAX_WBITS       # 输出 gzip 格式
+AUTO_WBITS = 32 + zlib.MAX_WBITS       # 自动识别 zlib/gzip 头
+
+
+def build_header(message_type=FULL_CLIENT_REQUEST, flags=NO_SEQUENCE,
+                 serialization=JSON, compression=GZIP, reserved=0x00,
+                 extension_header=b""):
+    """生成协议头"""
+    header_size = len(extension_header) // 4 + 1
+    return bytes((
+        (PROTOCOL_VERSION << 4) | header_size,
+        (message_type << 4) | flags,
+        (serialization << 4) | compression,
+        reserved,
+    )) + bytes(extension_header)
+
+
+FULL_REQUEST_HEADER = build_header()
+AUDIO_HEADER = build_header(AUDIO_ONLY_REQUEST)
+LAST_AUDIO_HEADER = build_header(AUDIO_ONLY_REQUEST, NEG_SEQUENCE)
+AUDIO_HEADER_RAW = build_header(AUDIO_ONLY_REQUEST, compression=NO_COMPRESSION)
+LAST_AUDIO_HEADER_RAW = build_header(AUDIO_ONLY_REQUEST, NEG_SEQUENCE, compression=NO_COMPRESSION)
+
+
+def audio_header(is_last=False, compress=True):
+    """返回预先计算好的音频包头"""
+    if compress:
+        return LAST_AUDIO_HEADER if is_last else AUDIO_HEADER
+    return LAST_AUDIO_HEADER_RAW if is_last else AUDIO_HEADER_RAW
+
+
+class GzipCompressor:
+    """按固定级别压缩，每包输出独立完整的 gzip 流，服务端可单独解压
+
+    每包新建 compressobj：从预建对象 copy() 需要复制整个窗口与哈希表，实测并不比新建快。
+    """
+
+    def __init__(self, level=1):
+        self.level = level
+
+    def compress(self, data):
+        c = zlib.compressobj(self.level, zlib.DEFLATED, GZIP_WBITS)
+        return c.compress(data) + c.flush()
+
+
+class ASRPacker:
+    """把请求参数与音频分片打包为完整帧"""
+
+    def __init__(self, level=1):
+        self.compressor = GzipCompressor(level)
+
+    def pack_full_request(self, request_params):
+        payload = self.compressor.compress(json.dumps(request_params).encode())
+        return b"".join((FULL_REQUEST_HEADER, len(payload).to_bytes(4, 'big'), payload))
+
+    def pack_audio(self, chunk, is_last=False, compress=True):
+        """chunk 可为 bytes 或 memoryview；不压缩时负载直接拼接，不额外复制"""
+        payload = self.compressor.compress(chunk) if compress else chunk
+        return b"".join((audio_header(is_last, compress), len(payload).to_bytes(4, 'big'), payload))
+
+
+def slice_data(data, chunk_size):
+    """按 chunk_size 切分，返回 memoryview 切片（不拷贝）"""
+    view = memoryview(data)
+    data_len = len(view)
+    offset = 0
+    while offset + chunk_size < data_len:
+        yield view[offset: offset + chunk_size], False
+        offset += chunk_size
+    yield view[offset:], True
+
+
+def _decode_payload(payload, compression, serialization):
+    if compression == GZIP:
+        try:
+            payload = zlib.decompress(payload, AUTO_WBITS)
+        except zlib.error as e:
+            return {"error": f"解压失败: {e}"}, False
+
+    if serialization == JSON:
+        try:
+            return json.loads(bytes(payload).decode("utf-8")), True
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            # 尝试直接解码为字符串
+            try:
+                return bytes(payload).decode("utf-8"), True
+            except UnicodeDecodeError:
+                return {"error": f"数据解码失败: {e}"}, False
+    try:
+        return bytes(payload).decode("utf-8"), True
+    except UnicodeDecodeError:
+        return {"error": "字符串解码失败"}, False
+
+
+def parse_response(res):
+    """解析服务器响应帧，返回 {'seq'?, 'code'?, 'payload_msg'?} 或 {'error'}
+
+    WebSocket 消息边界即帧边界，每次 recv() 得到一个完整帧，因此按整帧解析。
+    """
+    if len(res) < 4:
+        return {"error": "响应数据过短"}
+
+    view = memoryview(res)
+    header_size = view[0] & 0x0f
+    message_type = view[1] >> 4
+    serialization = view[2] >> 4
+    compression = view[2] & 0x0f
+
+    if header_size * 4 > len(view):
+        return {"error": "头部大小错误"}
+
+    payload = view[header_size * 4:]
+    result = {}
+    payload_msg = None
+
+    if message_type == FULL_SERVER_RESPONSE:
+        if len(payload) >= 4:
+            payload_msg = payload[4:]
+    elif message_type == SERVER_ACK:
+        if len(payload) >= 4:
+            result['seq'] = int.from_bytes(payload[:4], "big", signed=True)
+        if len(payload) >= 8:
+            payload_msg = payload[8:]
+    elif message_type == SERVER_ERROR_RESPONSE:
+        if len(payload) >= 4:
+            result['code'] = int.from_bytes(payload[:4], "big", signed=False)
+        payload_msg = payload[8:] if len(payload) >= 8 else None
+
+    if payload_msg is not None and len(payload_msg):
+        decoded, ok = _decode_payload(payload_msg, compression, serialization)
+        if not ok:
+            return decoded
+        result['payload_msg'] = decoded
+
+    return result
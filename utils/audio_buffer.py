@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""音频缓冲 - 录音线程写入 PCM，识别线程直接读取，不经过文件"""
+
+import asyncio
+import struct
+import threading
+
+
+class AudioBuffer:
+    """线程安全、预分配定长的 PCM 缓冲区
+
+    录音线程调用 write()/close()，识别线程中的协程通过 chunks() 按游标读取，
+    数据到达时通过 call_soon_threadsafe 唤醒等待的协程，无需轮询。
+    容量按最大录音时长一次性分配，写满即拒绝继续写入。
+    可选闸门（gate）：读取方等到 open_gate() 指定语音起点后才开始读取，
+    用于在上传前丢弃本地 VAD 判定的前导静音。
+    """
+
+    def __init__(self, rate=16000, channels=1, sampwidth=2, max_seconds=30):
+        self.rate = rate
+        self.channels = channels
+        self.sampwidth = sampwidth
+        self.capacity = int(max_seconds * rate * channels * sampwidth)
+        self._data = bytearray(self.capacity)
+        self._start = 0   # 有效数据起点（裁剪前导静音后可大于 0）
+        self._end = 0     # 写入位置
+        self._gated = False
+        self._lock = threading.Lock()
+        self._closed = False
+        self._waiters = []  # [(loop, asyncio.Event)]
+
+    @property
+    def closed(self):
+        return self._closed
+
+    @property
+    def full(self):
+        return self._end >= self.capacity
+
+    @property
+    def size(self):
+        return self._end - self._start
+
+    @property
+    def written(self):
+        """自开始录音以来写入的总字节数（不受裁剪影响）"""
+        return self._end
+
+    @property
+    def frame_size(self):
+        return self.channels * self.sampwidth
+
+    @property
+    def nframes(self):
+        return self.size // self.frame_size if self.frame_size else 0
+
+    @property
+    def bytes_per_second(self):
+        return self.rate * self.channels * self.sampwidth
+
+    @property
+    def duration(self):
+        """当前已缓冲音频时长（秒）"""
+        return self.size / self.bytes_per_second if self.bytes_per_second else 0
+
+    def write(self, chunk):
+        """追加 PCM 数据（录音线程调用），缓冲已满或已关闭时返回 False"""
+        if self._closed:
+            return False
+        if not chunk:
+            return True
+        with self._lock:
+            n = min(len(chunk), self.capacity - self._end)
+            self._data[self._end: self._end + n] = chunk[:n]
+            self._end += n
+            accepted = n == len(chunk)
+        self._notify()
+        return accepted
+
+    def close(self):
+        """标记录音结束，读取方会收到最后一个分片"""
+        self._closed = True
+        self._notify()
+
+    def gate(self):
+        """关闭闸门：读取方在 open_gate() 或 close() 之前不读取任何数据"""
+        self._gated = True
+
+    def open_gate(self, start=0):
+        """打开闸门，从绝对偏移 start 开始提供数据"""
+        with self._lock:
+            if self._gated:
+                self._start = self._align(min(max(0, start), self._end))
+                self._gated = False
+        self._notify()
+
+    def trim(self, start=None, end=None):
+        """按绝对偏移裁剪有效区间（用于去掉首尾静音，不移动数据）"""
+        with self._lock:
+            if start is not None:
+                self._start = self._align(min(max(0, start), self._end))
+            if end is not None:
+                self._end = max(self._start, self._align(min(end, self._end)))
+
+    def _align(self, offset):
+        return offset - offset % self.frame_size if self.frame_size else offset
+
+    def view(self, start=0, end=None):
+        """返回有效数据的 memoryview（相对偏移，不拷贝）"""
+        size = self.size
+        end = size if end is None else min(end, size)
+        return memoryview(self._data)[self._start + start: self._start + max(start, end)]
+
+    def getvalue(self):
+        """返回当前全部 PCM 数据的副本"""
+        with self._lock:
+            return bytes(self.view())
+
+    def wav_header(self):
+        """按元数据生成 44 字节 WAV 头"""
+        data_size = self.size
+        return struct.pack(
+            '<4sI4s4sIHHIIHH4sI',
+            b'RIFF', 36 + data_size, b'WAVE',
+            b'fmt ', 16, 1, self.channels, self.rate,
+            self.bytes_per_second, self.frame_size, self.sampwidth * 8,
+            b'data', data_size
+        )
+
+    def _notify(self):
+        with self._lock:
+            waiters = list(self._waiters)
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # 事件循环已关闭
+                pass
+
+    async def chunks(self, segment_size):
+        """按 segment_size 异步产出 (memoryview, is_last)
+
+        录音未结束时只产出完整分片；结束后产出剩余数据并标记 is_last，
+        剩余为空时产出空的最后一包，用于通知服务端音频结束。
+        """
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        waiter = (loop, event)
+        with self._lock:
+            self._waiters.append(waiter)
+
+        offset = 0
+        try:
+            while True:
+                event.clear()
+                with self._lock:
+                    closed = self._closed
+                    size = self._end - self._start
+                    available = size - offset
+                    if self._gated and not closed:
+                        end = None
+                    elif available >= segment_size and not (closed and available == segment_size):
+                        end = offset + segment_size
+                    elif closed:
+                        end = max(offset, size)
+                    else:
+                        end = None
+
+                if end is None:
+                    await event.wait()
+                    continue
+
+                chunk = self.view(offset, end)
+                offset = end
+                if closed and offset >= self.size:
+                    yield chunk, True
+                    return
+                yield chunk, False
+        finally:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
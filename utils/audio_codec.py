@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""识别上传音频编码 - 采集与 ASRThread 之间的可插拔编码环节"""
+
+import asyncio
+import logging
+import shutil
+
+logger = logging.getLogger(__name__)
+
+
+class PCMEncoder:
+    """原样上传 PCM（默认与回退方案），wav=True 时首包前置 WAV 头"""
+
+    name = "raw"
+    compressible = True  # PCM 仍按协议逐包 gzip
+
+    def __init__(self, wav=False):
+        self.wav = wav
+
+    def audio_params(self, buffer):
+        """请求参数中的 audio 字段"""
+        return {
+            'format': 'wav' if self.wav else 'raw',
+            'codec': 'raw',
+            'rate': buffer.rate,
+            'bits': buffer.sampwidth * 8,
+            'channel': buffer.channels,
+        }
+
+    async def transform(self, buffer, audio_chunks):
+        """把 (pcm, is_last) 分片转换为待发送的 (payload, is_last) 分片"""
+        first = self.wav
+        async for chunk, is_last in audio_chunks:
+            if first:
+                chunk = buffer.wav_header() + chunk
+                first = False
+            yield chunk, is_last
+
+
+class OggOpusEncoder:
+    """通过 ffmpeg 子进程把 PCM 实时编码为 Ogg/Opus
+
+    PCM 分片写入 ffmpeg stdin，stdout 上每产出一段 Ogg 页就作为一个分包发送；
+    页时长与帧长都设为 20ms，保证边录边传时不会积压。
+    Opus 数据已高度压缩，不再逐包 gzip。
+    """
+
+    name = "opus"
+    compressible = False
+
+    def __init__(self, bitrate_kbps=24):
+        self.bitrate_kbps = bitrate_kbps
+
+    @staticmethod
+    def available():
+        return shutil.which("ffmpeg") is not None
+
+    def audio_params(self, buffer):
+        return {
+            'format': 'ogg',
+            'codec': 'opus',
+            'rate': buffer.rate,
+            'bits': buffer.sampwidth * 8,
+            'channel': buffer.channels,
+        }
+
+    def _command(self, buffer):
+        return [
+            "ffmpeg", "-hide_banner", "-loglevel", "error",
+            "-f", f"s{buffer.sampwidth * 8}le",
+            "-ar", str(buffer.rate),
+            "-ac", str(buffer.channels),
+            "-i", "pipe:0",
+            "-c:a", "libopus",
+            "-b:a", f"{self.bitrate_kbps}k",
+            "-application", "voip",
+            "-frame_duration", "20",
+            "-page_duration", "20000",
+            "-flush_packets", "1",
+            "-f", "ogg", "pipe:1",
+        ]
+
+    async def transform(self, buffer, audio_chunks):
+        proc = await asyncio.create_subprocess_exec(
+            *self._command(buffer),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+
+        async def feed():
+            try:
+                async for chunk, _ in audio_chunks:
+                    proc.stdin.write(chunk)
+                    await proc.stdin.drain()
+            finally:
+                proc.stdin.close()
+
+        feeder = asyncio.create_task(feed())
+        try:
+            # 保留最近一段输出，读到 EOF 时才能把它标记为最后一包
+            pending = None
+            while True:
+                data = await proc.stdout.read(65536)
+                if not data:
+                    break
+                if pending is not None:
+                    yield pending, False
+                pending = data
+
+            await feeder  # 采集端的异常在此抛出
+            if await proc.wait() != 0:
+                raise Exception(f"ffmpeg 编码失败（退出码 {proc.returncode}）")
+            yield pending or b"", True
+        finally:
+            if not feeder.done():
+                feeder.cancel()
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+
+
+def create_encoder(codec, wav=False, bitrate_kbps=24):
+    """按配置创建编码器；不可用时回退为 PCM"""
+    if codec == OggOpusEncoder.name:
+        if OggOpusEncoder.available():
+            return OggOpusEncoder(bitrate_kbps)
+        logger.warning("未找到 ffmpeg，识别音频回退为 PCM 上传")
+    elif codec != PCMEncoder.name:
+        logger.warning(f"未知的识别音频编码 {codec}，回退为 PCM 上传")
+    return PCMEncoder(wav=wav)
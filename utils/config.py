@@ -15,6 +15,32 @@ class Config:
     API_KEY: str = os.getenv("API_KEY", "da092e1c-5988-43d2-ae0b-e1c2dd70f41e")
     BASE_URL: str = os.getenv("BASE_URL", "https://ark.cn-beijing.volces.com/api/v3")
     MODEL_NAME: str = os.getenv("MODEL_NAME", "doubao-seedream-3-0-t2i-250415")
+    # 生图调度：共享线程池并发数、相邻请求错开启动间隔、限流/5xx 退避参数
+    GEN_CONCURRENCY: int = int(os.getenv("GEN_CONCURRENCY", "4"))
+    GEN_STAGGER_MS: int = int(os.getenv("GEN_STAGGER_MS", "500"))
+    GEN_BACKOFF_BASE: float = float(os.getenv("GEN_BACKOFF_BASE", "1.0"))  # 首次退避上限（秒），之后每次翻倍
+    GEN_BACKOFF_MAX: float = float(os.getenv("GEN_BACKOFF_MAX", "8.0"))
+    # 图片随接口响应以 base64 内联返回，省去一次 CDN 下载和临时文件；失败时回退为 URL 下载
+    GEN_INLINE_IMAGE: bool = os.getenv("GEN_INLINE_IMAGE", "1") == "1"
+    # URL 下载时边下边解码，缩略图先显示低分辨率预览
+    GEN_PREVIEW: bool = os.getenv("GEN_PREVIEW", "1") == "1"
+    GEN_PREVIEW_INTERVAL_MS: int = int(os.getenv("GEN_PREVIEW_INTERVAL_MS", "300"))
+    # 渐进网格：第一张图片到达就显示网格和按钮，其余各格独立填充
+    GEN_PROGRESSIVE_GRID: bool = os.getenv("GEN_PROGRESSIVE_GRID", "1") == "1"
+    # 生成图片的保存格式（png/jpeg/webp）与质量档位（fast/balanced/best），编码线程数（0 为 CPU 核数）
+    IMAGE_FORMAT: str = os.getenv("IMAGE_FORMAT", "png")
+    IMAGE_QUALITY: str = os.getenv("IMAGE_QUALITY", "fast")
+    ENCODE_WORKERS: int = int(os.getenv("ENCODE_WORKERS", "0"))
+    # 缩略图/查看器图片的后台解码线程数
+    DECODE_WORKERS: int = int(os.getenv("DECODE_WORKERS", "2"))
+    # 解码后端：pil（draft/reduce）或 qt（QImageReader.setScaledSize）
+    DECODE_BACKEND: str = os.getenv("DECODE_BACKEND", "pil")
+    # 图片查看器：预解码前后各几张，已解码图片缓存上限（MB）
+    VIEWER_PREFETCH: int = int(os.getenv("VIEWER_PREFETCH", "1"))
+    VIEWER_CACHE_MB: int = int(os.getenv("VIEWER_CACHE_MB", "24"))
+    # 共享连接池：空闲长连接保持时长、DNS 解析缓存时长（秒）
+    HTTP_KEEPALIVE: float = float(os.getenv("HTTP_KEEPALIVE", "60"))
+    DNS_CACHE_TTL: int = int(os.getenv("DNS_CACHE_TTL", "300"))
 
     # 语音识别配置 - 使用环境变量
     ASR_APP_ID: str = os.getenv("ASR_APP_ID", "6505759856")
@@ -22,6 +48,28 @@ class Config:
     ASR_SECRET: str = os.getenv("ASR_SECRET", "ClwFYkQ-WwP7y04_sYw-0Fo9ZMWQtGHD")
     ASR_CLUSTER: str = os.getenv("ASR_CLUSTER", "volcengine_streaming_common")
     ASR_WS_URL: str = os.getenv("ASR_WS_URL", "wss://openspeech.bytedance.com/api/v2/asr")
+    # 流式识别：边录边传，实时显示中间结果
+    ASR_STREAMING: bool = os.getenv("ASR_STREAMING", "1") == "1"
+    ASR_STREAM_SEGMENT_MS: int = int(os.getenv("ASR_STREAM_SEGMENT_MS", "200"))  # 流式分包时长（毫秒）
+    # 连接预热：进入录音页时后台建立并保活识别连接
+    ASR_PREWARM: bool = os.getenv("ASR_PREWARM", "1") == "1"
+    ASR_PREWARM_WINDOW: int = int(os.getenv("ASR_PREWARM_WINDOW", "300"))  # 预热保持时长（秒）
+    ASR_SPARE_MAX_AGE: int = int(os.getenv("ASR_SPARE_MAX_AGE", "60"))  # 备用连接最长复用时间（秒）
+    # 上传编码：raw 为原始 PCM（回退方案），opus 为 Ogg/Opus（需要 ffmpeg）
+    ASR_AUDIO_CODEC: str = os.getenv("ASR_AUDIO_CODEC", "raw")
+    ASR_OPUS_BITRATE: int = int(os.getenv("ASR_OPUS_BITRATE", "24"))  # kbps
+    # 对冲请求：主路首个响应超过 p95 耗时仍未到达时，向备用集群/地址重发同一段音频
+    ASR_HEDGE: bool = os.getenv("ASR_HEDGE", "0") == "1"
+    ASR_BACKUP_WS_URL: str = os.getenv("ASR_BACKUP_WS_URL", "")  # 为空时与主路相同
+    ASR_BACKUP_CLUSTER: str = os.getenv("ASR_BACKUP_CLUSTER", "")  # 为空时与主路相同
+    ASR_HEDGE_DELAY: float = float(os.getenv("ASR_HEDGE_DELAY", "2.0"))  # 样本不足时的对冲延迟（秒）
+    ASR_HEDGE_MIN_DELAY: float = 0.3
+    # 离线识别（Vosk）：fallback 为云端超时/失败时启用，race 为与云端同时识别取先到者，off 关闭
+    ASR_LOCAL_MODE: str = os.getenv("ASR_LOCAL_MODE", "fallback")
+    ASR_LOCAL_MODEL: str = os.getenv("ASR_LOCAL_MODEL", os.path.expanduser("~/models/vosk-model-small-cn-0.22"))
+    ASR_LOCAL_BUDGET: float = float(os.getenv("ASR_LOCAL_BUDGET", "3.0"))  # 云端首个响应的等待上限（秒）
+    ASR_GZIP_LEVEL: int = int(os.getenv("ASR_GZIP_LEVEL", "1"))  # 音频包 gzip 级别（1 最快）
+    ASR_MAX_INFLIGHT: int = int(os.getenv("ASR_MAX_INFLIGHT", "4"))  # 未收到确认时最多在途的音频分片数
 
     # 音频配置
     SAMPLE_RATE: int = 16000
@@ -30,6 +78,19 @@ class Config:
     CHUNK_SIZE: int = 512
     MAX_RECORD_TIME: int = 30  # 最大录音时长（秒）
     MIN_RECORD_TIME: float = 0.5  # 最小录音时长（秒）
+    RECORD_IN_MEMORY: bool = os.getenv("RECORD_IN_MEMORY", "1") == "1"  # 录音直接交给识别线程，不写临时文件
+    # 常驻采集（需内存模式）：录音页可见时保持麦克风打开，按下时从预录音开始
+    CAPTURE_PERSISTENT: bool = os.getenv("CAPTURE_PERSISTENT", "1") == "1"
+    CAPTURE_PREROLL_MS: int = int(os.getenv("CAPTURE_PREROLL_MS", "500"))
+
+    # 本地 VAD：裁掉首尾静音，说完后自动停止录音
+    VAD_ENABLED: bool = os.getenv("VAD_ENABLED", "1") == "1"
+    VAD_AUTO_STOP: bool = os.getenv("VAD_AUTO_STOP", "1") == "1"
+    VAD_HANGOVER_MS: int = int(os.getenv("VAD_HANGOVER_MS", "1000"))  # 语音后持续静音多久自动停止
+    VAD_PAD_MS: int = 200           # 语音前后保留的余量
+    VAD_MIN_SPEECH_MS: int = 200    # 累计语音达到该时长才算开口
+    VAD_MIN_DB: float = -50.0       # 能量阈值下限（dBFS）
+    VAD_MARGIN_DB: float = 12.0     # 高出噪声底多少分贝判为语音
 
     # UI配置
     WINDOW_TITLE: str = "AI语音画聊 · 用说话生成专属图片"
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""可取消的 HTTP 请求 - 取消时直接关闭正在阻塞读写的 socket，而不是等到超时"""
+
+import socket
+import threading
+import weakref
+from contextlib import contextmanager
+
+import httpcore
+import httpx
+
+
+class RequestCancelled(Exception):
+    """请求已被取消"""
+
+
+class CancelToken:
+    """一次任务的取消标志
+
+    任务线程在 cancel_scope(token) 内发起的 httpx 请求，读写时会把所用 socket
+    登记到 token；其他线程调用 cancel() 时对这些 socket 执行 shutdown，
+    阻塞中的 recv/send 立即返回错误，任务线程随即退出。wait() 可替代 sleep，
+    在取消时提前醒来。
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._socks = weakref.WeakSet()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        self._event.set()
+        with self._lock:
+            socks = list(self._socks)
+            self._socks.clear()
+        for sock in socks:
+            _shutdown(sock)
+
+    def wait(self, timeout=None):
+        """等待至超时或被取消；被取消时返回 True"""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise RequestCancelled()
+
+    def attach(self, sock):
+        with self._lock:
+            if not self.cancelled:
+                self._socks.add(sock)
+                return
+        _shutdown(sock)
+
+    def detach(self, sock):
+        with self._lock:
+            self._socks.discard(sock)
+
+
+def _shutdown(sock):
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+_local = threading.local()
+
+
+def current_token():
+    return getattr(_local, 'token', None)
+
+
+@contextmanager
+def cancel_scope(token):
+    """在当前线程内把 httpx 请求与 token 关联"""
+    previous = current_token()
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = previous
+
+
+class CancellableStream(httpcore.NetworkStream):
+    """包装底层连接：每次读写前后把 socket 登记到当前线程的 token"""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    @contextmanager
+    def _guard(self):
+        token = current_token()
+        sock = self._stream.get_extra_info("socket")
+        if token is None or sock is None:
+            yield
+            return
+        token.raise_if_cancelled()
+        token.attach(sock)
+        try:
+            yield
+        finally:
+            token.detach(sock)
+
+    def read(self, max_bytes, timeout=None):
+        with self._guard():
+            return self._stream.read(max_bytes, timeout)
+
+    def write(self, buffer, timeout=None):
+        with self._guard():
+            self._stream.write(buffer, timeout)
+
+    def close(self):
+        self._stream.close()
+
+    def start_tls(self, ssl_context, server_hostname=None, timeout=None):
+        with self._guard():
+            return CancellableStream(self._stream.start_tls(ssl_context, server_hostname, timeout))
+
+    def get_extra_info(self, info):
+        return self._stream.get_extra_info(info)
+
+
+class CancellableBackend(httpcore.SyncBackend):
+    """httpcore 网络后端：新建的连接都包装为可取消的流"""
+
+    def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        token = current_token()
+        if token is not None:
+            token.raise_if_cancelled()
+        stream = super().connect_tcp(host, port, timeout, local_address, socket_options)
+        return self.wrap(stream)
+
+    def wrap(self, stream):
+        return CancellableStream(stream)
+
+
+def _install_backend(transport, backend):
+    # HTTPTransport 没有公开 network_backend 参数，只能替换连接池的后端
+    pool = getattr(transport, "_pool", None)
+    if pool is None or not hasattr(pool, "_network_backend"):
+        raise RuntimeError(
+            f"httpx {httpx.__version__} / httpcore {httpcore.__version__} 不再提供 _pool._network_backend，"
+            "请求将无法取消；请安装 requirements.txt 中锁定的版本")
+    pool._network_backend = backend
+
+
+def check_backend_hook():
+    """启动时确认当前 httpx/httpcore 版本仍支持替换网络后端，不支持时直接抛出 RuntimeError"""
+    transport = httpx.HTTPTransport()
+    try:
+        _install_backend(transport, CancellableBackend())
+    finally:
+        transport.close()
+
+
+def make_client(backend=None, **kwargs):
+    """创建一个支持 cancel_scope 取消的 httpx.Client；backend 为 CancellableBackend 子类实例，其余参数同 httpx.Client"""
+    transport = httpx.HTTPTransport(verify=kwargs.get('verify', True),
+                                    limits=kwargs.pop('limits', httpx.Limits()))
+    _install_backend(transport, backend or CancellableBackend())
+    return httpx.Client(transport=transport, **kwargs)
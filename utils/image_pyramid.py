@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""图片金字塔 - 生成时一次性输出缩略图/查看器/原图三档尺寸，并写入清单文件"""
+
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class ImagePyramid:
+    """每张生成图片对应一组文件：
+
+        20250101_120000_000000.png          原图（full，对外的主路径）
+        20250101_120000_000000@viewer.png   查看器尺寸
+        20250101_120000_000000@thumb.png    网格缩略图尺寸
+        20250101_120000_000000.json         清单：各档文件名与尺寸
+
+    界面按需要的尺寸取对应档位，不再在 GUI 线程上解码大图再平滑缩放。
+    清单最后写入，存在即表示各档文件已齐全；没有清单时一律退回原图。
+    """
+
+    # 档位名 -> 最大宽高（与 ImageViewer、ImageThumbnail 的显示区域一致），从大到小
+    LEVELS = (
+        ("viewer", (780, 430)),
+        ("thumb", (220, 220)),
+    )
+
+    @staticmethod
+    def manifest_path(path):
+        return os.path.splitext(path)[0] + ".json"
+
+    @classmethod
+    def build(cls, im, base_path, encoder):
+        """编码原图及各档缩小图，写入清单，返回原图路径"""
+        full_path = encoder.encode(im, base_path)
+        levels = {"full": {"file": os.path.basename(full_path), "size": list(im.size)}}
+
+        # 逐级由上一档缩小，避免每档都从原图重采样
+        current = im
+        for name, box in cls.LEVELS:
+            current = encoder.resize(current.copy(), box)
+            level_path = encoder.encode(current, f"{base_path}@{name}")
+            levels[name] = {"file": os.path.basename(level_path), "size": list(current.size)}
+
+        manifest = {"version": 1, "format": encoder.format, "levels": levels}
+        tmp = cls.manifest_path(full_path) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp, cls.manifest_path(full_path))
+        return full_path
+
+    @classmethod
+    def load(cls, path):
+        """读取清单，不存在或损坏时返回 None"""
+        try:
+            with open(cls.manifest_path(path), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @classmethod
+    def level_path(cls, path, level):
+        """返回指定档位的文件路径，没有该档时返回原图路径"""
+        manifest = cls.load(path)
+        if manifest:
+            entry = manifest.get("levels", {}).get(level)
+            if entry:
+                candidate = os.path.join(os.path.dirname(path), entry["file"])
+                if os.path.exists(candidate):
+                    return candidate
+        return path
+
+    @classmethod
+    def remove(cls, path):
+        """删除原图及其各档文件和清单"""
+        manifest = cls.load(path)
+        files = [path]
+        if manifest:
+            folder = os.path.dirname(path)
+            files += [os.path.join(folder, entry["file"]) for entry in manifest.get("levels", {}).values()]
+            files.append(cls.manifest_path(path))
+        for file in dict.fromkeys(files):
+            try:
+                if os.path.exists(file):
+                    os.remove(file)
+            except OSError as e:
+                logger.error(f"删除图片失败 {file}: {e}")
@@ -2,7 +2,10 @@
 """图片处理工具"""
 
 import os
+import time
 from PIL import Image
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice, QSize, Qt
+from PySide6.QtGui import QImage, QImageReader
 
 
 class ImageUtils:
@@ -38,3 +41,89 @@ class ImageUtils:
         except Exception as e:
             print(f"❌ PNG 转换失败: {e}")
             return image_path
+
+    @staticmethod
+    def ensure_complete(data):
+        """检查图片数据是否完整（JPEG 结束标记、PNG IEND、WebP RIFF 长度），不完整时抛出 ValueError
+
+        进程内 ImageFile.LOAD_TRUNCATED_IMAGES 为 True 时 PIL 会把缺失部分补成灰色而不报错，
+        最终解码前必须先做这项检查。无法识别的格式不做判断。
+        """
+        view = memoryview(data)
+        head = bytes(view[:12])
+        tail = bytes(view[-64:])
+        if head.startswith(b"\xff\xd8"):
+            complete = b"\xff\xd9" in tail
+        elif head.startswith(b"\x89PNG\r\n\x1a\n"):
+            complete = b"IEND" in tail[-12:]
+        elif head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            complete = int.from_bytes(head[4:8], "little") + 8 <= len(view)
+        else:
+            complete = True
+        if not complete:
+            raise ValueError(f"图片数据不完整 ({len(view)} bytes)")
+
+    @staticmethod
+    def qimage_rgb(image):
+        """QImage 转为 (宽, 高, 紧密排列的 RGB 字节)，去掉每行的 4 字节对齐填充"""
+        image = image.convertToFormat(QImage.Format_RGB888)
+        row = image.width() * 3
+        stride = image.bytesPerLine()
+        buf = memoryview(image.constBits())
+        if stride == row:
+            data = bytes(buf[:row * image.height()])
+        else:
+            data = b"".join(buf[y * stride:y * stride + row] for y in range(image.height()))
+        return image.width(), image.height(), data
+
+    @staticmethod
+    def rgb_frame(im, size):
+        """缩小到最长边 size，返回 (宽, 高, RGB 字节)，供界面直接构造 QImage"""
+        im = im.convert('RGB')  # 总是返回副本，不改动传入的图片
+        im.thumbnail((size, size), Image.Resampling.BILINEAR, reducing_gap=2.0)
+        return im.width, im.height, im.tobytes("raw", "RGB")
+
+
+class ProgressivePreview:
+    """边下载边生成低分辨率预览
+
+    每隔 interval 秒且数据增长超过 min_growth 时，用 QImageReader 对已到达的前缀
+    做一次缩小解码：JPEG 按 DCT 比例缩放，代价只有几毫秒；基线 JPEG 得到已到达的
+    上半部分，渐进式 JPEG 得到整幅的粗糙版本，PNG 要到数据完整才出图。
+    截断解码只在这里进行，不改动 PIL 的全局设置。返回 (宽, 高, RGB 字节)。
+    """
+
+    SIZE = 220  # 与网格缩略图一致
+    MIN_BYTES = 2048  # 头部都还没到时不必尝试
+
+    def __init__(self, size=SIZE, interval=0.3, min_growth=0.1):
+        self.size = size
+        self.interval = interval
+        self.min_growth = min_growth
+        self._last_time = 0.0
+        self._last_bytes = 0
+
+    def update(self, data, length):
+        """data 为下载缓冲，length 为已写入的字节数；到时间时返回预览，否则返回 None"""
+        now = time.monotonic()
+        if length < self.MIN_BYTES or now - self._last_time < self.interval:
+            return None
+        if length < self._last_bytes * (1 + self.min_growth):
+            return None
+        self._last_time = now
+        self._last_bytes = length
+        buffer = QBuffer()
+        buffer.setData(QByteArray(bytes(memoryview(data)[:length])))
+        buffer.open(QIODevice.ReadOnly)
+        reader = QImageReader(buffer)
+        if reader.format() == b"png":
+            return None  # libpng 不能解码不完整的数据，等最终图片
+        size = reader.size()
+        if not size.isValid():
+            return None  # 数据还不够识别格式，等下一块
+        size.scale(QSize(self.size, self.size), Qt.KeepAspectRatio)
+        reader.setScaledSize(size)
+        image = reader.read()
+        if image.isNull():
+            return None
+        return ImageUtils.qimage_rgb(image)
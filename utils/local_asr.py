@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""离线语音识别 - 网络不可用或过慢时的本地 CPU 识别引擎（Vosk）"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import vosk
+except Exception:
+    vosk = None
+
+logger = logging.getLogger(__name__)
+
+
+class LocalASREngine:
+    """Vosk 离线识别引擎
+
+    模型全局共享一份，首次识别（或 preload()）时才在后台线程加载，
+    不使用时不占内存；解码在单独的工作线程中逐片进行，不阻塞事件循环，
+    录音结束时只剩最后一片需要解码。
+    """
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self._model = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-asr")
+
+    @classmethod
+    def get_instance(cls):
+        """获取全局实例"""
+        if not hasattr(cls, '_instance'):
+            from utils.config import Config
+            cls._instance = cls(Config.get_instance().ASR_LOCAL_MODEL)
+        return cls._instance
+
+    def available(self):
+        return vosk is not None and os.path.isdir(self.model_path)
+
+    def preload(self):
+        """在后台加载模型（可重复调用）"""
+        if self.available() and self._model is None:
+            self._executor.submit(self._load)
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                vosk.SetLogLevel(-1)
+                logger.info(f"加载离线识别模型: {self.model_path}")
+                self._model = vosk.Model(self.model_path)
+        return self._model
+
+    @staticmethod
+    def _text(result, key="text"):
+        # 中文模型按词输出，词间带空格
+        return "".join(json.loads(result).get(key, "").split())
+
+    async def recognize(self, pcm_chunks, rate, on_partial=None):
+        """逐片解码 (pcm, is_last) 分片，返回最终文本；on_partial 接收中间结果"""
+        loop = asyncio.get_running_loop()
+        model = await loop.run_in_executor(self._executor, self._load)
+        recognizer = vosk.KaldiRecognizer(model, rate)
+
+        texts = []
+        async for chunk, _ in pcm_chunks:
+            if not chunk:
+                continue
+            complete = await loop.run_in_executor(
+                self._executor, recognizer.AcceptWaveform, bytes(chunk))
+            if complete:
+                texts.append(self._text(recognizer.Result()))
+            elif on_partial:
+                partial = self._text(recognizer.PartialResult(), "partial")
+                if partial:
+                    on_partial("".join(texts) + partial)
+
+        final = await loop.run_in_executor(self._executor, recognizer.FinalResult)
+        texts.append(self._text(final))
+        return "".join(texts)
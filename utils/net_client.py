@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""全局网络客户端 - 生图接口与图片下载共用一个连接池（长连接、DNS 缓存、TLS 会话复用）"""
+
+import logging
+import os
+import socket
+import ssl
+import threading
+import time
+
+import certifi
+import httpcore
+import httpx
+from volcenginesdkarkruntime import Ark
+
+from utils.config import Config
+from utils.http_cancel import CancellableBackend, make_client
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledBackend(CancellableBackend):
+    """在可取消后端之上增加 DNS 缓存
+
+    新建连接时主机名按 DNS_CACHE_TTL 缓存解析结果，连接池扩容时不再每次解析。
+    """
+
+    def __init__(self, dns_ttl):
+        super().__init__()
+        self.dns_ttl = dns_ttl
+        self._lock = threading.Lock()
+        self._dns = {}  # (host, port) -> (过期时间, [地址])
+
+    def resolve(self, host, port):
+        key = (host, port)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._dns.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        addrs = list(dict.fromkeys(info[4][0] for info in infos))
+        with self._lock:
+            self._dns[key] = (now + self.dns_ttl, addrs)
+        return addrs
+
+    def forget(self, host, port):
+        with self._lock:
+            self._dns.pop((host, port), None)
+
+    def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        try:
+            addrs = self.resolve(host, port)
+        except OSError as e:
+            raise httpcore.ConnectError(e) from e
+        for i, addr in enumerate(addrs):
+            try:
+                return super().connect_tcp(addr, port, timeout, local_address, socket_options)
+            except httpcore.ConnectError:
+                if i == len(addrs) - 1:
+                    self.forget(host, port)  # 缓存的地址都连不上，下次重新解析
+                    raise
+
+
+class _ResumingSSLSocket(ssl.SSLSocket):
+    """首次收到数据和关闭时把 TLS 会话交给所属上下文保存"""
+
+    _session_saved = False
+
+    def recv(self, buflen=1024, flags=0):
+        data = super().recv(buflen, flags)
+        if not self._session_saved:
+            # TLS 1.3 的会话票据在握手后随首个响应下发，收到数据后再保存会话
+            self._session_saved = True
+            self.context.save_session(self.server_hostname, self.session)
+        return data
+
+    def close(self):
+        self.context.save_session(self.server_hostname, self.session)
+        super().close()
+
+
+class _ResumingSSLContext(ssl.SSLContext):
+    """按主机名复用 TLS 会话的 SSLContext
+
+    作为 verify 传给 httpx，httpcore 建立连接时调用 wrap_socket；这里带上同一
+    主机上次连接留下的会话票据，连接池扩容时走简化握手而不是完整握手。
+    """
+
+    sslsocket_class = _ResumingSSLSocket
+
+    def __init__(self, *args, **kwargs):
+        self._session_lock = threading.Lock()
+        self._sessions = {}  # server_hostname -> ssl.SSLSession
+
+    @classmethod
+    def create(cls):
+        """与 httpx 默认上下文相同的校验配置（SSL_CERT_FILE / SSL_CERT_DIR 或 certifi）"""
+        ctx = cls(ssl.PROTOCOL_TLS_CLIENT)
+        if os.environ.get("SSL_CERT_FILE"):
+            ctx.load_verify_locations(cafile=os.environ["SSL_CERT_FILE"])
+        elif os.environ.get("SSL_CERT_DIR"):
+            ctx.load_verify_locations(capath=os.environ["SSL_CERT_DIR"])
+        else:
+            ctx.load_verify_locations(cafile=certifi.where())
+        return ctx
+
+    def save_session(self, hostname, session):
+        if hostname and session is not None:
+            with self._session_lock:
+                self._sessions[hostname] = session
+
+    def wrap_socket(self, sock, server_side=False, do_handshake_on_connect=True,
+                    suppress_ragged_eofs=True, server_hostname=None, session=None):
+        if session is None and server_hostname:
+            with self._session_lock:
+                session = self._sessions.get(server_hostname)
+        return super().wrap_socket(sock, server_side, do_handshake_on_connect,
+                                   suppress_ragged_eofs, server_hostname, session)
+
+
+class NetClient:
+    """进程内共享的 httpx 客户端和 Ark 客户端
+
+    连接池大小按 GEN_CONCURRENCY 设定（Ark 接口与图片 CDN 各一份），所有生图
+    任务共用，长连接在请求之间保持；请求仍可通过 http_cancel.cancel_scope 取消。
+    退出时调用 shutdown() 关闭全部连接。
+    """
+
+    def __init__(self):
+        self.config = Config.get_instance()
+        self._lock = threading.Lock()
+        self._http = None
+        self._ark = None
+
+    @classmethod
+    def get_instance(cls):
+        """获取全局实例"""
+        if not hasattr(cls, '_instance'):
+            cls._instance = cls()
+        return cls._instance
+
+    @property
+    def http(self):
+        with self._lock:
+            if self._http is None:
+                size = max(1, self.config.GEN_CONCURRENCY) * 2
+                self._http = make_client(
+                    timeout=self.config.REQUEST_TIMEOUT,
+                    follow_redirects=True,
+                    verify=_ResumingSSLContext.create(),
+                    limits=httpx.Limits(max_connections=size,
+                                        max_keepalive_connections=size,
+                                        keepalive_expiry=self.config.HTTP_KEEPALIVE),
+                    backend=_PooledBackend(self.config.DNS_CACHE_TTL),
+                )
+            return self._http
+
+    @property
+    def ark(self):
+        http = self.http
+        with self._lock:
+            if self._ark is None:
+                self._ark = Ark(
+                    base_url=self.config.BASE_URL,
+                    api_key=self.config.API_KEY,
+                    timeout=self.config.REQUEST_TIMEOUT,
+                    max_retries=0,  # 重试由 ImageGenJob.with_retry 负责（带抖动、可取消）
+                    http_client=http
+                )
+            return self._ark
+
+    def shutdown(self):
+        """关闭连接池（之后再次使用会重新创建）"""
+        with self._lock:
+            http, self._http, self._ark = self._http, None, None
+        if http is not None:
+            http.close()
+            logger.info("🔌 网络连接池已关闭")
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""按占用内存限额的 LRU 图片缓存"""
+
+from collections import OrderedDict
+
+
+class PixmapCache:
+    """键到 QPixmap 的 LRU 缓存，按像素数据大小（宽×高×深度）计算占用
+
+    超出 max_bytes 时从最久未用的一端淘汰；单张超过上限的图片不缓存。
+    只在 GUI 线程使用。
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self._items = OrderedDict()  # key -> (QPixmap, 字节数)
+
+    @staticmethod
+    def cost(pixmap):
+        return pixmap.width() * pixmap.height() * max(1, pixmap.depth() // 8)
+
+    def get(self, key):
+        """命中时返回 QPixmap 并标记为最近使用，否则返回 None"""
+        entry = self._items.get(key)
+        if entry is None:
+            return None
+        self._items.move_to_end(key)
+        return entry[0]
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def put(self, key, pixmap):
+        self.discard(key)
+        cost = self.cost(pixmap)
+        if cost > self.max_bytes:
+            return
+        self._items[key] = (pixmap, cost)
+        self.used += cost
+        while self.used > self.max_bytes:
+            _, (_, evicted) = self._items.popitem(last=False)
+            self.used -= evicted
+
+    def discard(self, key):
+        entry = self._items.pop(key, None)
+        if entry is not None:
+            self.used -= entry[1]
+
+    def clear(self):
+        self._items.clear()
+        self.used = 0
+
+    def __len__(self):
+        return len(self._items)
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""流式重采样 - 采集时逐块把设备原生采样率转换为 16kHz 单声道 S16，NumPy 向量化"""
+
+from math import gcd
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+
+class StreamingResampler:
+    """有理数比例的多相 FIR 重采样器
+
+    输出率/输入率约分为 up/down，低通滤波器按 up 相拆分为多相滤波器组，
+    每个输出样本只计算它所在相位的 taps_per_phase 个乘加，不做补零与抽取。
+    块与块之间保留 taps_per_phase-1 个输入样本作为历史，与整段一次性
+    重采样结果一致；多声道输入先平均为单声道。
+    """
+
+    CUTOFF = 0.9
+
+    def __init__(self, in_rate, out_rate=16000, channels=1, taps_per_phase=32):
+        g = gcd(in_rate, out_rate)
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.channels = channels
+        self.up = out_rate // g
+        self.down = in_rate // g
+        self.taps = taps_per_phase
+
+        # Kaiser 窗 sinc 低通，截止频率取输入/输出奈奎斯特频率中较低者的 CUTOFF 倍，
+        # 让过渡带落在奈奎斯特频率以内，抑制折叠到语音频段的混叠
+        n = taps_per_phase * self.up
+        cutoff = self.CUTOFF / max(self.up, self.down)
+        k = np.arange(n) - (n - 1) / 2
+        h = cutoff * np.sinc(cutoff * k) * np.kaiser(n, 8.0)
+        h *= self.up / h.sum()  # 补零插值后直流增益为 1
+        # bank[p, j] = h[p + j * up]
+        self._bank = np.ascontiguousarray(h.reshape(taps_per_phase, self.up).T, dtype=np.float32)
+        self._offsets = np.arange(taps_per_phase)
+        self.reset()
+
+    @staticmethod
+    def available():
+        return np is not None
+
+    @property
+    def passthrough(self):
+        return self.up == self.down and self.channels == 1
+
+    def reset(self):
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        self._rest = b""
+        self._t = 0  # 下一个输出样本在插值域中的位置（相对当前块首个输入样本）
+
+    def process(self, chunk):
+        """送入一段 S16 PCM，返回已可输出的 16kHz 单声道 S16 字节"""
+        if self.passthrough:
+            return bytes(chunk)
+
+        data = self._rest + bytes(chunk)
+        frame = 2 * self.channels
+        usable = len(data) - len(data) % frame
+        self._rest = data[usable:]
+        if usable == 0:
+            return b""
+
+        x = np.frombuffer(data, dtype='<i2', count=usable // 2).astype(np.float32)
+        if self.channels > 1:
+            x = x.reshape(-1, self.channels).mean(axis=1)
+        return self._filter(x)
+
+    def flush(self):
+        """录音结束时调用，输出滤波器中剩余的尾部样本"""
+        if self.passthrough:
+            return b""
+        return self._filter(np.zeros(self.taps // 2, dtype=np.float32))
+
+    def _filter(self, x):
+        n = len(x)
+        hist = len(self._history)
+        w = np.concatenate((self._history, x))
+
+        ts = np.arange(self._t, n * self.up, self.down)
+        if len(ts):
+            i = ts // self.up
+            phase = ts - i * self.up
+            idx = (hist + i)[:, None] - self._offsets[None, :]
+            y = np.einsum('ij,ij->i', w[idx], self._bank[phase])
+            self._t = int(ts[-1]) + self.down - n * self.up
+        else:
+            y = np.empty(0, dtype=np.float32)
+            self._t -= n * self.up
+
+        self._history = w[len(w) - hist:] if hist else self._history
+        return np.clip(np.rint(y), -32768, 32767).astype('<i2').tobytes()
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""本地语音活动检测（VAD）- 基于短时能量与过零率，NumPy 向量化"""
+
+import logging
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+
+class EnergyVAD:
+    """能量 + 过零率 VAD
+
+    按 frame_ms 分帧，一次性向量化计算每帧能量（dBFS）与过零率：
+    能量高于阈值判为语音；能量略低但过零率高（清辅音 s/sh/x 等）也判为语音。
+    阈值 = max(min_db, 噪声底 + margin_db)，噪声底从非语音帧中缓慢跟踪。
+    """
+
+    ZCR_MIN = 0.25      # 清辅音的过零率下限
+    ZCR_DB_SLACK = 10   # 清辅音允许低于能量阈值的分贝数
+
+    def __init__(self, rate=16000, frame_ms=20, min_db=-50.0, margin_db=12.0,
+                 hangover_ms=1000, pad_ms=200, min_speech_ms=200):
+        self.rate = rate
+        self.frame_len = max(1, int(rate * frame_ms / 1000))
+        self.frame_ms = frame_ms
+        self.min_db = min_db
+        self.margin_db = margin_db
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.pad_frames = pad_ms // frame_ms
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.reset()
+
+    @staticmethod
+    def available():
+        return np is not None
+
+    def reset(self):
+        """清空流式状态"""
+        self._rest = b""
+        self._frames = 0            # 已处理帧数
+        self._noise_db = None       # 噪声底估计
+        self._speech_frames = 0     # 累计语音帧数
+        self.speech_start = None    # 首个语音帧序号
+        self.speech_end = None      # 最后语音帧之后的帧序号
+        self._silence_run = 0
+
+    # ---------- 向量化特征 ----------
+
+    def _features(self, pcm):
+        """返回 (每帧能量 dBFS, 每帧过零率)，不足一帧的尾部忽略"""
+        samples = np.frombuffer(pcm, dtype='<i2')
+        n = len(samples) // self.frame_len
+        if n == 0:
+            return np.empty(0, np.float32), np.empty(0, np.float32)
+        frames = samples[:n * self.frame_len].reshape(n, self.frame_len).astype(np.float32)
+        frames *= 1.0 / 32768.0
+
+        power = np.einsum('ij,ij->i', frames, frames) / self.frame_len
+        energy_db = 10.0 * np.log10(power + 1e-10)
+
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (self.frame_len - 1)
+        return energy_db, zcr.astype(np.float32)
+
+    def _classify(self, energy_db, zcr, threshold):
+        loud = energy_db > threshold
+        fricative = (energy_db > threshold - self.ZCR_DB_SLACK) & (zcr > self.ZCR_MIN)
+        return loud | fricative
+
+    # ---------- 整段裁剪 ----------
+
+    def trim_bounds(self, pcm):
+        """返回去掉首尾静音后的字节区间 (start, end)；未检测到语音时返回整段"""
+        energy_db, zcr = self._features(pcm)
+        if len(energy_db) == 0:
+            return 0, len(pcm)
+
+        noise_db = float(np.percentile(energy_db, 10))
+        threshold = max(self.min_db, noise_db + self.margin_db)
+        speech = np.flatnonzero(self._classify(energy_db, zcr, threshold))
+        if len(speech) < self.min_speech_frames:
+            return 0, len(pcm)
+
+        first = max(0, int(speech[0]) - self.pad_frames)
+        last = min(len(energy_db), int(speech[-1]) + 1 + self.pad_frames)
+        frame_bytes = self.frame_len * 2
+        end = len(pcm) if last == len(energy_db) else last * frame_bytes
+        return first * frame_bytes, end
+
+    # ---------- 流式 ----------
+
+    def update(self, chunk):
+        """送入一段 PCM，返回是否应自动结束录音（语音后静音超过 hangover）"""
+        data = self._rest + bytes(chunk)
+        usable = len(data) - len(data) % (self.frame_len * 2)
+        self._rest = data[usable:]
+        energy_db, zcr = self._features(data[:usable])
+        if len(energy_db) == 0:
+            return False
+
+        if self._noise_db is None:
+            self._noise_db = float(energy_db.min())
+
+        threshold = max(self.min_db, self._noise_db + self.margin_db)
+        speech = self._classify(energy_db, zcr, threshold)
+
+        # 噪声底跟踪：只用非语音帧，缓慢上调、快速下调
+        quiet = energy_db[~speech]
+        if len(quiet):
+            level = float(quiet.mean())
+            rate = 0.05 if level > self._noise_db else 0.5
+            self._noise_db += rate * (level - self._noise_db)
+
+        idx = np.flatnonzero(speech)
+        base = self._frames
+        self._frames += len(speech)
+        if len(idx):
+            if self.speech_start is None:
+                self.speech_start = base + int(idx[0])
+            self.speech_end = base + int(idx[-1]) + 1
+            self._speech_frames += len(idx)
+            self._silence_run = len(speech) - int(idx[-1]) - 1
+        else:
+            self._silence_run += len(speech)
+
+        return (self._speech_frames >= self.min_speech_frames
+                and self._silence_run >= self.hangover_frames)
+
+    @property
+    def speech_detected(self):
+        return self._speech_frames >= self.min_speech_frames
+
+    def speech_start_byte(self):
+        """语音起点（含前置余量）的字节偏移；尚未检测到语音时返回 None"""
+        if not self.speech_detected:
+            return None
+        return max(0, self.speech_start - self.pad_frames) * self.frame_len * 2
+
+    def speech_end_byte(self):
+        """语音终点（含后置余量）的字节偏移；尚未检测到语音时返回 None"""
+        if not self.speech_detected:
+            return None
+        return (self.speech_end + self.pad_frames) * self.frame_len * 2
+
+    @classmethod
+    def from_config(cls, config, rate=None):
+        return cls(
+            rate=rate or config.SAMPLE_RATE,
+            min_db=config.VAD_MIN_DB,
+            margin_db=config.VAD_MARGIN_DB,
+            hangover_ms=config.VAD_HANGOVER_MS,
+            pad_ms=config.VAD_PAD_MS,
+            min_speech_ms=config.VAD_MIN_SPEECH_MS,
+        )
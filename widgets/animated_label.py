@@ -41,6 +41,13 @@ class AnimatedLabel(QLabel):
         # 开始打字机效果
         self.type_timer.start(50)
 
+    def show_partial(self, text):
+        """直接显示中间结果（流式识别），不播放动画"""
+        self.type_timer.stop()
+        self.full_text = text
+        self.current_index = len(text)
+        self.setText(text)
+
     def type_next_char(self):
         """显示下一个字符"""
         if self.current_index < len(self.full_text):
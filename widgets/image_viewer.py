@@ -3,8 +3,12 @@
 
 from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
                                QPushButton, QWidget, QFrame)
-from PySide6.QtCore import Qt, Signal, Slot, QSize
+from PySide6.QtCore import Qt, Signal, Slot
 from PySide6.QtGui import QPixmap
+from utils.image_pyramid import ImagePyramid
+from threads.image_decode_service import ImageDecodeService
+from utils.config import Config
+from utils.pixmap_cache import PixmapCache
 import os
 import logging
 
@@ -12,16 +16,39 @@ logger = logging.getLogger(__name__)
 
 
 class ImageViewer(QDialog):
-    """自定义图片查看器"""
+    """自定义图片查看器
+
+    可重复使用：页面只创建一次，之后通过 set_images() 切换图片列表和当前位置。
+    当前图片及前后 VIEWER_PREFETCH 张在后台解码，结果放进按 VIEWER_CACHE_MB
+    限额的 LRU 缓存，翻页命中缓存时立即显示。
+    """
+
+    VIEW_SIZE = (780, 430)
     
     save_requested = Signal(str)
     
     def __init__(self, image_paths, current_index=0, parent=None):
         super().__init__(parent)
+        config = Config.get_instance()
         self.image_paths = image_paths
         self.current_index = current_index
+        self.prefetch = max(0, config.VIEWER_PREFETCH)
+        self.cache = PixmapCache(config.VIEWER_CACHE_MB * 1024 * 1024)
+        self._tickets = {}  # 路径 -> 进行中的后台解码请求
         self.setup_ui()
         self.load_current_image()
+
+    def set_images(self, image_paths, current_index=0):
+        """切换到新的图片列表（列表可与调用方共享，追加的图片翻页时可见）"""
+        self.image_paths = image_paths
+        self.current_index = current_index
+        self.load_current_image()
+        self.update_navigation_buttons()
+
+    def clear_cache(self):
+        """取消全部解码并清空缓存（图片被删除时调用）"""
+        self._cancel_except(())
+        self.cache.clear()
         
     def setup_ui(self):
         """设置UI"""
@@ -151,17 +178,62 @@ class ImageViewer(QDialog):
         # 更新按钮状态
         self.update_navigation_buttons()
     
-    def load_current_image(self):
-        """加载当前图片"""
+    def current_path(self):
         if 0 <= self.current_index < len(self.image_paths):
-            path = self.image_paths[self.current_index]
-            if os.path.exists(path):
-                pixmap = QPixmap(path)
-                if not pixmap.isNull():
-                    scaled = pixmap.scaled(QSize(780, 430), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                    self.image_label.setPixmap(scaled)
-                    return
-        self.image_label.setText("图片加载失败")
+            return self.image_paths[self.current_index]
+        return None
+
+    def load_current_image(self):
+        """显示当前图片（缓存命中立即显示，否则后台解码），并预解码相邻图片"""
+        path = self.current_path()
+        if path is None or not os.path.exists(path):
+            self.image_label.setText("图片加载失败")
+        else:
+            pixmap = self.cache.get(path)
+            if pixmap is not None:
+                self.image_label.setPixmap(pixmap)
+            else:
+                self.image_label.setText("加载中...")
+        self._schedule()
+
+    def _schedule(self):
+        """为当前及相邻图片发起解码，取消已不在窗口内的请求"""
+        lo = max(0, self.current_index - self.prefetch)
+        hi = min(len(self.image_paths), self.current_index + self.prefetch + 1)
+        wanted = [p for p in self.image_paths[lo:hi] if p not in self.cache and os.path.exists(p)]
+        # 当前图片优先入队
+        current = self.current_path()
+        wanted.sort(key=lambda p: p != current)
+        self._cancel_except(wanted)
+        service = ImageDecodeService.get_instance()
+        for path in wanted:
+            if path not in self._tickets:
+                # 优先解码生成时预先缩好的查看器档
+                self._tickets[path] = service.request(
+                    ImagePyramid.level_path(path, "viewer"), self.VIEW_SIZE,
+                    lambda image, p=path: self._on_decoded(p, image))
+
+    def _cancel_except(self, keep):
+        service = ImageDecodeService.get_instance()
+        for path in [p for p in self._tickets if p not in keep]:
+            service.cancel(self._tickets.pop(path))
+
+    def _on_decoded(self, path, image):
+        self._tickets.pop(path, None)
+        current = path == self.current_path()
+        if image is None:
+            if current:
+                self.image_label.setText("图片加载失败")
+            return
+        pixmap = QPixmap.fromImage(image)
+        self.cache.put(path, pixmap)
+        if current:
+            self.image_label.setPixmap(pixmap)
+
+    def done(self, result):
+        """关闭时取消未完成的解码（已缓存的图片保留，下次打开直接显示）"""
+        self._cancel_except(())
+        super().done(result)
     
     def show_previous(self):
         """显示上一张图片"""